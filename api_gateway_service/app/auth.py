@@ -0,0 +1,57 @@
+import os
+
+from fastapi import Request, Response
+
+from shared.identity import sign_identity
+from shared.tokens import AccessTokenVerifier, JWKSKeySet
+
+
+class EdgeAuthenticator:
+    """
+    Проверка bearer-токена на входе в gateway.
+
+    Невалидный токен отклоняется с 401 до обращения к upstream, для валидного
+    в запрос добавляются подписанные заголовки X-User-*, которым доверяет
+    `get_current_user` в task_service - повторная проверка через RPC не нужна.
+    """
+
+    def __init__(self, verifier: AccessTokenVerifier, identity_secret: str):
+        self.verifier = verifier
+        self.identity_secret = identity_secret
+
+    @classmethod
+    def from_env(cls) -> "EdgeAuthenticator | None":
+        if os.getenv("GATEWAY_AUTH_MODE", "off").lower() != "edge":
+            return None
+        identity_secret = os.getenv("GATEWAY_IDENTITY_SECRET")
+        if not identity_secret:
+            raise RuntimeError("GATEWAY_AUTH_MODE=edge requires GATEWAY_IDENTITY_SECRET")
+
+        if os.getenv("JWKS_URL"):
+            verifier = AccessTokenVerifier(
+                key=os.getenv("SECRET_KEY"),
+                algorithm=os.getenv("ALGORITHM", "HS256"),
+                jwks=JWKSKeySet(os.environ["JWKS_URL"]),
+            )
+        else:
+            key = os.getenv("JWT_PUBLIC_KEY") or os.getenv("SECRET_KEY")
+            if not key:
+                raise RuntimeError("GATEWAY_AUTH_MODE=edge requires JWKS_URL, JWT_PUBLIC_KEY or SECRET_KEY")
+            verifier = AccessTokenVerifier(key=key, algorithm=os.getenv("ALGORITHM", "HS256"))
+        return cls(verifier, identity_secret)
+
+    async def connect(self):
+        await self.verifier.connect()
+
+    async def authenticate(self, request: Request, path: str) -> list[tuple[str, str]] | Response:
+        """Возвращает заголовки идентичности или ответ 401."""
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        user_id = await self.verifier.verify(token) if scheme.lower() == "bearer" and token else None
+        if user_id is None:
+            return Response(
+                content='{"detail":"Invalid token"}',
+                status_code=401,
+                media_type="application/json",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return sign_identity(self.identity_secret, user_id, request.method, f"/{path}", request.url.query)
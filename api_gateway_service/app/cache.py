@@ -0,0 +1,260 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from prometheus_client import Counter, Gauge
+
+from shared.identity import USER_ID_HEADER
+
+CACHE_REQUESTS = Counter(
+    "gateway_cache_requests_total",
+    "Cacheable GET requests by outcome (hit, not_modified, miss, bypass)",
+    ["route", "result"],
+)
+CACHE_EVICTIONS = Counter("gateway_cache_evictions_total", "Entries evicted to stay within the memory limit")
+CACHE_BYTES = Gauge("gateway_cache_bytes", "Bytes held by the response cache")
+CACHE_ENTRIES = Gauge("gateway_cache_entries", "Entries held by the response cache")
+
+# Заголовки запроса, которые уже входят в ключ кэша: Vary по ним не мешает кэшированию
+VARY_IN_KEY = frozenset({"accept-encoding"})
+
+
+@dataclass
+class CachedResponse:
+    status_code: int
+    headers: list[tuple[str, str]]
+    body: bytes
+    etag: str
+    expires_at: float
+    principal: str
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(name) + len(value) for name, value in self.headers)
+
+
+def principal_of(request: Request, identity_headers: list[tuple[str, str]] | None) -> str:
+    """Кому принадлежит ответ: id пользователя после edge-проверки либо хэш заголовка Authorization."""
+    for name, value in identity_headers or []:
+        if name == USER_ID_HEADER:
+            return f"user:{value}"
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return "anonymous"
+    return "auth:" + hashlib.sha256(authorization.encode()).hexdigest()[:32]
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Слабое сравнение ETag из If-None-Match (RFC 9110, 13.1.2)."""
+    if if_none_match.strip() == "*":
+        return True
+    weak = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == weak for candidate in if_none_match.split(","))
+
+
+def cache_directives(value: str) -> dict[str, str | None]:
+    """`public, max-age=60` -> {"public": None, "max-age": "60"}."""
+    directives = {}
+    for part in value.lower().split(","):
+        name, _, argument = part.partition("=")
+        if name.strip():
+            directives[name.strip()] = argument.strip().strip('"') or None
+    return directives
+
+
+def ttl_from_headers(
+    headers: list[tuple[str, str]], max_ttl: int, authorized: bool, private: bool = False
+) -> int:
+    """
+    TTL по Cache-Control ответа, не больше `max_ttl` маршрута; 0 - ответ кэшировать нельзя.
+
+    Кэшируется только то, что upstream разрешил явно: public, max-age или s-maxage.
+    Ответ на запрос с Authorization - только с public или s-maxage (RFC 9111, 3.5).
+    `private` - запись доступна одному проверенному пользователю: тогда хватает
+    max-age, а `private` в ответе не мешает кэшированию.
+    Vary допускается лишь по Accept-Encoding, который уже входит в ключ кэша.
+    """
+    directives: dict[str, str | None] = {}
+    for name, value in headers:
+        lowered = name.lower()
+        if lowered == "set-cookie":
+            return 0
+        if lowered == "vary":
+            varied = {field.strip().lower() for field in value.split(",") if field.strip()}
+            if not varied <= VARY_IN_KEY:
+                return 0
+        if lowered == "cache-control":
+            directives.update(cache_directives(value))
+
+    if directives.keys() & {"no-store", "no-cache"} or ("private" in directives and not private):
+        return 0
+    shared = "public" in directives or "s-maxage" in directives
+    if authorized and not (shared or private):
+        return 0
+    age = directives.get("s-maxage") or directives.get("max-age")
+    if age is not None:
+        return min(max_ttl, int(age)) if age.isdigit() else 0
+    return max_ttl if "public" in directives else 0
+
+
+class ResponseCache:
+    """
+    LRU-кэш ответов на GET с ограничением по памяти.
+
+    Ключ - маршрут, путь, query, Accept-Encoding и пользователь. Кэшируются только
+    ответы, которые upstream явно разрешил (см. `ttl_from_headers`); cache_ttl
+    маршрута ограничивает их TTL сверху. Ответы с `Cache-Control: private`
+    кэшируются, только если пользователь проверен на edge (principal "user:<id>").
+    If-None-Match с совпадающим ETag получает 304 без обращения к upstream.
+    Любой не-GET запрос пользователя сбрасывает его записи этого маршрута.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+        self.by_principal: dict[tuple[str, str], set[tuple]] = {}
+        self.size = 0
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache | None":
+        if os.getenv("GATEWAY_CACHE_ENABLED", "false").lower() not in {"1", "true", "yes"}:
+            return None
+        return cls(
+            max_bytes=int(os.getenv("GATEWAY_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+            max_entry_bytes=int(os.getenv("GATEWAY_CACHE_MAX_ENTRY_BYTES", str(1024 * 1024))),
+        )
+
+    def get(self, key: tuple) -> CachedResponse | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: tuple, route: str, entry: CachedResponse):
+        if entry.size > self.max_entry_bytes:
+            return
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = entry
+        self.by_principal.setdefault((entry.principal, route), set()).add(key)
+        self.size += entry.size
+        while self.size > self.max_bytes and self.entries:
+            self._remove(next(iter(self.entries)))
+            CACHE_EVICTIONS.inc()
+        self._report()
+
+    def invalidate(self, principal: str, route: str):
+        for key in self.by_principal.pop((principal, route), set()):
+            if key in self.entries:
+                self._remove(key)
+        self._report()
+
+    def _remove(self, key: tuple):
+        entry = self.entries.pop(key)
+        self.size -= entry.size
+        keys = self.by_principal.get((entry.principal, key[0]))
+        if keys is not None:
+            keys.discard(key)
+
+    def _report(self):
+        CACHE_BYTES.set(self.size)
+        CACHE_ENTRIES.set(len(self.entries))
+
+    async def handle(
+        self,
+        request: Request,
+        path: str,
+        *,
+        route: str,
+        principal: str,
+        max_ttl: int,
+        fetch: Callable[[], Awaitable[Response]],
+    ) -> Response:
+        if request.method != "GET":
+            response = await fetch()
+            self.invalidate(principal, route)
+            return response
+
+        key = (
+            route,
+            path,
+            str(request.query_params),
+            request.headers.get("accept-encoding", ""),
+            principal,
+        )
+        bypass = "no-cache" in request.headers.get("cache-control", "").lower()
+        entry = None if bypass else self.get(key)
+        if entry is not None:
+            if_none_match = request.headers.get("if-none-match")
+            if if_none_match and etag_matches(if_none_match, entry.etag):
+                CACHE_REQUESTS.labels(route=route, result="not_modified").inc()
+                return Response(status_code=304, headers={"ETag": entry.etag})
+            CACHE_REQUESTS.labels(route=route, result="hit").inc()
+            response = Response(content=entry.body, status_code=entry.status_code)
+            response.raw_headers.extend(
+                (name.encode("latin-1"), value.encode("latin-1"))
+                for name, value in entry.headers
+                if name.lower() != "content-length"
+            )
+            return response
+
+        CACHE_REQUESTS.labels(route=route, result="bypass" if bypass else "miss").inc()
+        response = await fetch()
+        if response.status_code != 200:
+            return response
+        headers = [(name.decode("latin-1"), value.decode("latin-1")) for name, value in response.raw_headers]
+        ttl = ttl_from_headers(
+            headers,
+            max_ttl,
+            authorized="authorization" in request.headers,
+            private=principal.startswith("user:"),
+        )
+        if ttl <= 0:
+            return response
+
+        def store(body: bytes):
+            stored_headers = headers
+            etag = next((value for name, value in headers if name.lower() == "etag"), None)
+            if etag is None:
+                etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+                stored_headers = [*headers, ("etag", etag)]
+            entry = CachedResponse(
+                status_code=response.status_code,
+                headers=stored_headers,
+                body=body,
+                etag=etag,
+                expires_at=time.monotonic() + ttl,
+                principal=principal,
+            )
+            self.put(key, route, entry)
+
+        if isinstance(response, StreamingResponse):
+            response.body_iterator = self._tee(response.body_iterator, store)
+        else:
+            store(response.body)
+        return response
+
+    async def _tee(self, iterator: AsyncIterator[bytes], store: Callable[[bytes], None]):
+        """Отдаёт чанки клиенту и копит их для кэша, пока ответ не превысит max_entry_bytes."""
+        chunks: list[bytes] | None = []
+        size = 0
+        async for chunk in iterator:
+            if chunks is not None:
+                size += len(chunk)
+                if size > self.max_entry_bytes:
+                    chunks = None
+                else:
+                    chunks.append(chunk)
+            yield chunk
+        if chunks is not None:
+            store(b"".join(chunks))
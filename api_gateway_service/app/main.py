@@ -3,20 +3,34 @@
 import os
 from contextlib import asynccontextmanager
 
-import httpx
 from fastapi import FastAPI, Request, Response
 
+from api_gateway_service.app.auth import EdgeAuthenticator
+from api_gateway_service.app.cache import ResponseCache, principal_of
+from api_gateway_service.app.proxy import forward
+from api_gateway_service.app.routing import RouteTable
+from shared.metrics import PrometheusMiddleware, metrics_response
+from shared.tracing import TracingMiddleware, setup_tracing
+
+setup_tracing("api_gateway_service")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    app.state.http_client = httpx.AsyncClient()
+    app.state.routes = RouteTable.load()
+    app.state.edge_auth = EdgeAuthenticator.from_env()
+    app.state.response_cache = ResponseCache.from_env()
+    if app.state.edge_auth:
+        await app.state.edge_auth.connect()
     try:
         yield
     finally:
-        await app.state.http_client.aclose()
+        await app.state.routes.aclose()
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(PrometheusMiddleware, service="api_gateway_service")
+app.add_middleware(TracingMiddleware)
 
 
 # @app.middleware("http")
@@ -35,38 +49,43 @@ app = FastAPI(lifespan=lifespan)
 #     return response
 
 
-AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL")
-TASK_SERVICE_URL = os.getenv("TASK_SERVICE_URL")
+GATEWAY_STREAMING = os.getenv("GATEWAY_STREAMING", "true").lower() in {"1", "true", "yes"}
+
+
+@app.get("/metrics")
+async def metrics():
+    return metrics_response()
 
 
 @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"])
 async def proxy_request(request: Request, path: str):
     """Эта функция определяет, какому сервису перенаправить запрос,
-    основываясь на начальной части URL-пути."""
-    target_url = None
-
-    if path.startswith("users"):
-        target_url = f"{AUTH_SERVICE_URL}/{path}"
-    elif path.startswith("tasks"):
-        target_url = f"{TASK_SERVICE_URL}/{path}"
-
-    if not target_url:
+    основываясь на первом сегменте URL-пути."""
+    route = app.state.routes.match(path)
+    if not route:
         return Response(content="Not Found", status_code=404)
-
-    body = await request.body()
-
-    proxied_req = app.state.http_client.build_request(
-        method=request.method,
-        url=target_url,
-        headers=request.headers,
-        params=request.query_params,
-        content=body,
-    )
-
-    response = await app.state.http_client.send(proxied_req)
-
-    return Response(
-        content=response.content,
-        status_code=response.status_code,
-        headers=dict(response.headers),
+    # Метка метрик - префикс upstream-маршрута, а не шаблон /{path:path}
+    request.state.metrics_route = f"/{route.prefix}"
+
+    identity_headers = None
+    if route.auth_required and app.state.edge_auth:
+        identity_headers = await app.state.edge_auth.authenticate(request, path)
+        if isinstance(identity_headers, Response):
+            return identity_headers
+
+    async def fetch() -> Response:
+        return await forward(
+            route.choose(), request, path, streaming=GATEWAY_STREAMING, extra_headers=identity_headers
+        )
+
+    cache = app.state.response_cache
+    if cache is None or route.cache_ttl is None:
+        return await fetch()
+    return await cache.handle(
+        request,
+        path,
+        route=route.prefix,
+        principal=principal_of(request, identity_headers),
+        max_ttl=route.cache_ttl,
+        fetch=fetch,
     )
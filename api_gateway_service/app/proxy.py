@@ -0,0 +1,138 @@
+from collections.abc import Iterable
+
+import httpx
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+
+from api_gateway_service.app.upstreams import Upstream
+from shared.identity import IDENTITY_HEADERS
+from shared.tracing import TRACE_HEADERS, tracer
+
+# RFC 9110, 7.6.1: заголовки одного соединения, не пересылаются дальше прокси
+HOP_BY_HOP_HEADERS = frozenset(
+    {
+        "connection",
+        "keep-alive",
+        "proxy-authenticate",
+        "proxy-authorization",
+        "proxy-connection",
+        "te",
+        "trailer",
+        "transfer-encoding",
+        "upgrade",
+    }
+)
+
+
+def filter_headers(headers: Iterable[tuple[str, str]], drop: Iterable[str] = ()) -> list[tuple[str, str]]:
+    """
+    Убирает hop-by-hop заголовки, в том числе перечисленные в `Connection`.
+    Повторяющиеся заголовки (Set-Cookie) сохраняются.
+    """
+    headers = list(headers)
+    excluded = set(HOP_BY_HOP_HEADERS) | {name.lower() for name in drop}
+    for name, value in headers:
+        if name.lower() == "connection":
+            excluded.update(token.strip().lower() for token in value.split(","))
+    return [(name, value) for name, value in headers if name.lower() not in excluded]
+
+
+def forwarded_for(request: Request) -> list[tuple[str, str]]:
+    """
+    X-Forwarded-For с адресом клиента, дописанным справа. Сервисы доверяют только
+    правому адресу, который добавил gateway: значения, присланные клиентом, остаются
+    левее и для лимитов не учитываются.
+    """
+    hops = [value for value in request.headers.getlist("x-forwarded-for") if value.strip()]
+    if request.client:
+        hops.append(request.client.host)
+    return [("x-forwarded-for", ", ".join(hops))] if hops else []
+
+
+def build_response(upstream: httpx.Response, content) -> Response:
+    if isinstance(content, bytes):
+        # Content-Length посчитает сам Response
+        response = Response(content=content, status_code=upstream.status_code)
+        drop = ("content-length",)
+    else:
+        response = StreamingResponse(content=content, status_code=upstream.status_code)
+        drop = ()
+    response.raw_headers.extend(
+        (name.encode("latin-1"), value.encode("latin-1"))
+        for name, value in filter_headers(upstream.headers.multi_items(), drop=drop)
+    )
+    return response
+
+
+async def forward(
+    upstream: Upstream,
+    request: Request,
+    path: str,
+    streaming: bool = True,
+    extra_headers: list[tuple[str, str]] | None = None,
+) -> Response:
+    """
+    Пересылает запрос в upstream.
+
+    В потоковом режиме тело запроса передаётся по частям из `request.stream()`,
+    а ответ отдаётся клиенту по мере чтения `aiter_raw()` - память на запрос
+    не зависит от размера тела. Без потокового режима тела буферизуются целиком.
+    Заголовки X-User-* клиента отбрасываются, их может выставить только сам gateway;
+    в X-Forwarded-For дописывается адрес клиента.
+    """
+    content = request.stream() if streaming else await request.body()
+    url = f"{upstream.base_url}/{path}"
+    # Спан до получения заголовков ответа; тело в потоковом режиме читается уже после него
+    with tracer.span(f"proxy {request.method}", kind="client", **{"http.url": url}) as span:
+        drop = ("host", "x-forwarded-for", *IDENTITY_HEADERS, *(TRACE_HEADERS if tracer.enabled else ()))
+        headers = filter_headers(request.headers.items(), drop=drop) + forwarded_for(request)
+        proxied_req = upstream.client.build_request(
+            method=request.method,
+            url=url,
+            headers=headers + (extra_headers or []) + tracer.headers(),
+            # multi_items сохраняет повторяющиеся параметры и их порядок, как в подписи идентичности
+            params=request.query_params.multi_items(),
+            content=content,
+        )
+
+        upstream.acquire()
+        try:
+            response = await upstream.client.send(proxied_req, stream=True)
+        except httpx.PoolTimeout:
+            upstream.release()
+            upstream.pool_timeout()
+            span.record_error("upstream pool exhausted")
+            return Response(content="Service Unavailable: upstream pool exhausted", status_code=503)
+        except httpx.RequestError as e:
+            upstream.release()
+            span.record_error(e)
+            return Response(content=f"Bad Gateway: {e.__class__.__name__}", status_code=502)
+        span.set_attribute("http.status_code", response.status_code)
+
+    closed = False
+
+    async def close():
+        nonlocal closed
+        if closed:
+            return
+        closed = True
+        await response.aclose()
+        upstream.release()
+
+    async def stream_body():
+        # finally выполняется и при обрыве соединения клиентом или ошибке чтения upstream:
+        # иначе соединение httpx осталось бы занятым, а in_flight - увеличенным навсегда
+        try:
+            async for chunk in response.aiter_raw():
+                yield chunk
+        finally:
+            await close()
+
+    if streaming:
+        return build_response(response, stream_body())
+
+    try:
+        body = b"".join([chunk async for chunk in response.aiter_raw()])
+    finally:
+        await close()
+    return build_response(response, body)
@@ -0,0 +1,90 @@
+import itertools
+import os
+from pathlib import Path
+
+import yaml
+
+from api_gateway_service.app.upstreams import PoolConfig, Upstream
+
+DEFAULT_ROUTES_FILE = Path(__file__).resolve().parent.parent / "routes.yaml"
+BALANCERS = ("round_robin", "least_outstanding")
+
+
+class Route:
+    """Маршрут gateway: один или несколько инстансов upstream и способ балансировки."""
+
+    def __init__(
+        self,
+        prefix: str,
+        instances: list[Upstream],
+        *,
+        balancer: str = "round_robin",
+        auth_required: bool = False,
+        cache_ttl: int | None = None,
+    ):
+        if not instances:
+            raise ValueError(f"Route {prefix} has no upstreams")
+        if balancer not in BALANCERS:
+            raise ValueError(f"Unknown balancer {balancer} for route {prefix}")
+        self.prefix = prefix
+        self.instances = instances
+        self.balancer = balancer
+        self.auth_required = auth_required
+        self.cache_ttl = cache_ttl
+        self._cycle = itertools.cycle(instances)
+
+    def choose(self) -> Upstream:
+        if len(self.instances) == 1:
+            return self.instances[0]
+        if self.balancer == "least_outstanding":
+            # При равной загрузке инстансы перебираются по кругу
+            start = next(self._cycle)
+            return min(self.instances, key=lambda instance: (instance.in_flight, instance is not start))
+        return next(self._cycle)
+
+
+class RouteTable:
+    """
+    Маршруты, скомпилированные в словарь по первому сегменту пути: выбор upstream - O(1).
+    `/users/me` попадает в маршрут `users`, а `/usersX` - никуда.
+    """
+
+    def __init__(self, routes: list[Route]):
+        self.routes: dict[str, Route] = {route.prefix: route for route in routes}
+
+    @classmethod
+    def load(cls, path: str | Path | None = None) -> "RouteTable":
+        path = Path(path or os.getenv("GATEWAY_ROUTES_FILE") or DEFAULT_ROUTES_FILE)
+        config = yaml.safe_load(os.path.expandvars(path.read_text(encoding="utf-8")))
+
+        routes = []
+        for prefix, spec in config["routes"].items():
+            name = spec.get("name", prefix)
+            urls = [
+                url.strip()
+                for entry in spec["upstreams"]
+                for url in str(entry).split(",")
+                if url.strip() and not url.strip().startswith("$")
+            ]
+            pool = PoolConfig(**spec.get("pool", {}))
+            if spec.get("pool_env_prefix"):
+                pool = PoolConfig.from_env(spec["pool_env_prefix"], defaults=pool)
+            instances = [Upstream(name, url, pool) for url in urls]
+            routes.append(
+                Route(
+                    prefix,
+                    instances,
+                    balancer=spec.get("balancer", "round_robin"),
+                    auth_required=spec.get("auth") == "required",
+                    cache_ttl=spec.get("cache_ttl"),
+                )
+            )
+        return cls(routes)
+
+    def match(self, path: str) -> Route | None:
+        return self.routes.get(path.split("/", 1)[0])
+
+    async def aclose(self):
+        for route in self.routes.values():
+            for instance in route.instances:
+                await instance.aclose()
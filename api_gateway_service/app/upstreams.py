@@ -0,0 +1,121 @@
+# pylint:disable=too-many-instance-attributes
+import importlib.util
+import os
+from dataclasses import dataclass
+
+import httpx
+from prometheus_client import Counter, Gauge
+
+UPSTREAM_IN_FLIGHT = Gauge(
+    "gateway_upstream_in_flight_requests",
+    "Requests currently holding a connection to the upstream",
+    ["upstream", "instance"],
+)
+UPSTREAM_POOL_SIZE = Gauge(
+    "gateway_upstream_pool_max_connections",
+    "Connection pool size configured for the upstream",
+    ["upstream", "instance"],
+)
+UPSTREAM_POOL_SATURATION = Gauge(
+    "gateway_upstream_pool_saturation",
+    "In-flight requests divided by pool size",
+    ["upstream", "instance"],
+)
+UPSTREAM_POOL_TIMEOUTS = Counter(
+    "gateway_upstream_pool_timeouts_total",
+    "Requests that gave up waiting for a free connection",
+    ["upstream", "instance"],
+)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def _env(name: str, default, cast=str):
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    if cast is bool:
+        return value.lower() in {"1", "true", "yes"}
+    return cast(value)
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    connect_timeout: float = 2.0
+    read_timeout: float = 15.0
+    write_timeout: float = 15.0
+    pool_timeout: float = 5.0
+
+    @classmethod
+    def from_env(cls, prefix: str, defaults: "PoolConfig | None" = None) -> "PoolConfig":
+        """Читает настройки пула из переменных `<PREFIX>_MAX_CONNECTIONS`, `<PREFIX>_HTTP2` и т.д."""
+        defaults = defaults or cls()
+        return cls(
+            max_connections=_env(f"{prefix}_MAX_CONNECTIONS", defaults.max_connections, int),
+            max_keepalive_connections=_env(
+                f"{prefix}_MAX_KEEPALIVE_CONNECTIONS", defaults.max_keepalive_connections, int
+            ),
+            keepalive_expiry=_env(f"{prefix}_KEEPALIVE_EXPIRY", defaults.keepalive_expiry, float),
+            http2=_env(f"{prefix}_HTTP2", defaults.http2, bool),
+            connect_timeout=_env(f"{prefix}_CONNECT_TIMEOUT", defaults.connect_timeout, float),
+            read_timeout=_env(f"{prefix}_READ_TIMEOUT", defaults.read_timeout, float),
+            write_timeout=_env(f"{prefix}_WRITE_TIMEOUT", defaults.write_timeout, float),
+            pool_timeout=_env(f"{prefix}_POOL_TIMEOUT", defaults.pool_timeout, float),
+        )
+
+
+class Upstream:
+    """
+    Backend-сервис со своим пулом соединений.
+
+    У каждого upstream отдельный httpx.AsyncClient: всплеск запросов к одному
+    сервису не занимает соединения другого, keep-alive соединения переиспользуются.
+    """
+
+    def __init__(self, name: str, base_url: str, config: PoolConfig):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.config = config
+        self.in_flight = 0
+
+        http2 = config.http2 and HTTP2_AVAILABLE
+        if config.http2 and not HTTP2_AVAILABLE:
+            print(f"HTTP/2 для {name} выключен: пакет h2 не установлен")
+        self.client = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                connect=config.connect_timeout,
+                read=config.read_timeout,
+                write=config.write_timeout,
+                pool=config.pool_timeout,
+            ),
+        )
+        self.labels = {"upstream": name, "instance": self.base_url}
+        UPSTREAM_POOL_SIZE.labels(**self.labels).set(config.max_connections)
+
+    def acquire(self):
+        self.in_flight += 1
+        self._report()
+
+    def release(self):
+        self.in_flight -= 1
+        self._report()
+
+    def pool_timeout(self):
+        UPSTREAM_POOL_TIMEOUTS.labels(**self.labels).inc()
+
+    def _report(self):
+        UPSTREAM_IN_FLIGHT.labels(**self.labels).set(self.in_flight)
+        UPSTREAM_POOL_SATURATION.labels(**self.labels).set(self.in_flight / self.config.max_connections)
+
+    async def aclose(self):
+        await self.client.aclose()
@@ -1,95 +1,55 @@
-# pylint:disable=bad-exception-cause,catching-non-exception,unused-argument
-# ruff:noqa:E712
-from time import time
+# pylint:disable=unused-argument
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Request, Response, status
+from fastapi import APIRouter, Depends, Path, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
-from prometheus_client import Counter, Gauge, Histogram, generate_latest
 from pydantic import Field
 
 from auth_service.app.auth.dependencies import get_user_service
-from auth_service.app.auth.security import (
-    create_access_token,
-    create_refresh_token,
-    get_email_current_user,
-)
-from auth_service.app.core.exceptions import ConflictException, NotFoundException
+from auth_service.app.auth.keys import key_ring
+from auth_service.app.auth.security import get_email_current_user
 from auth_service.app.core.limiter import limiter
 from auth_service.app.schemas.tokens import RefreshTokenRequest, TokenGroup
 from auth_service.app.schemas.users import User, UserCreate
 from auth_service.app.services.users import UserService
+from shared.metrics import metrics_response
+from shared.rate_limit import RateLimit
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-REQUEST_TOTAL = Counter(
-    "http_response_total",
-    "Total number of HTTP requests",
-    ["method", "endpoint", "status_code"],
-)
-
-ACTIVE_CONNECTIONS = Gauge("active_connections", "Current number of active connections", ["app"])
 
-REQUEST_DURATION = Histogram(
-    "http_request_duration_seconds",
-    "HTTP request duration in seconds",
-    ["method", "endpoint"],
-    buckets=[0.1, 0.3, 0.5, 1.0, 2.0, 5.0],
+@router.post(
+    "/register",
+    response_model=User,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(RateLimit(limiter, "5/hour"))],
 )
-
-
-@router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
-@limiter.limit("5/hour")
 async def register_user(
-    request: Request,
     user: Annotated[UserCreate, Field(description="User create data")],
     user_service: Annotated[UserService, Depends(get_user_service)],
 ):
-    ACTIVE_CONNECTIONS.labels(app="auth_service").inc()
-    start_time = time()
-    try:
-        user = await user_service.create_user(user=user)
-        REQUEST_DURATION.labels(method="POST", endpoint="/users/register").observe(time() - start_time)
-        REQUEST_TOTAL.labels(method="POST", endpoint="/users/register", status_code="201").inc()
-        return user
-    except ConflictException as e:
-        REQUEST_DURATION.labels(method="POST", endpoint="/users/register").observe(time() - start_time)
-        REQUEST_TOTAL.labels(method="POST", endpoint="/users/register", status_code=str(e.status_code)).inc()
-        raise HTTPException(status_code=e.status_code, detail=e.detail) from e
-    finally:
-        ACTIVE_CONNECTIONS.labels(app="auth_service").dec()
-
-
-@router.post("/token", status_code=status.HTTP_200_OK)
-@limiter.limit("10/hour")
+    return await user_service.create_user(user=user)
+
+
+@router.post(
+    "/token",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(RateLimit(limiter, "10/hour"))],
+)
 async def login(
-    request: Request,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     user_service: Annotated[UserService, Depends(get_user_service)],
 ):
     """
     Аутентифицирует пользователя и возвращает JWT с email, role и id.
     """
-    ACTIVE_CONNECTIONS.labels(app="auth_service").inc()
-    start_time = time()
-    try:
-        user = await user_service.authenticate_user(form_data.username, form_data.password)
-
-        access_token = create_access_token(data={"sub": user.email, "id": user.id})
-        refresh_token = create_refresh_token(data={"sub": user.email, "id": user.id})
-        REQUEST_DURATION.labels(method="POST", endpoint="/users/token").observe(time() - start_time)
-        REQUEST_TOTAL.labels(method="POST", endpoint="/users/token", status_code="200").inc()
-        return {
-            "access_token": access_token,
-            "refresh_token": refresh_token,
-            "token_type": "bearer",
-        }
-    except NotFoundException as e:
-        REQUEST_DURATION.labels(method="POST", endpoint="/users/token").observe(time() - start_time)
-        REQUEST_TOTAL.labels(method="POST", endpoint="/users/token", status_code=str(e.status_code)).inc()
-        raise HTTPException(status_code=e.status_code, detail=e.detail) from e
-    finally:
-        ACTIVE_CONNECTIONS.labels(app="auth_service").dec()
+    user = await user_service.authenticate_user(form_data.username, form_data.password)
+    tokens = await user_service.issue_tokens(user)
+    return {
+        "access_token": tokens.access_token,
+        "refresh_token": tokens.refresh_token.token,
+        "token_type": "bearer",
+    }
 
 
 @router.post("/refresh_token", response_model=TokenGroup)
@@ -97,45 +57,35 @@ async def update_access_token(
     request: RefreshTokenRequest,
     user_service: Annotated[UserService, Depends(get_user_service)],
 ):
-    ACTIVE_CONNECTIONS.labels(app="auth_service").inc()
-    start_time = time()
-    try:
-        token_group = await user_service.refresh_access_token(refresh_token=request.refresh_token)
-        REQUEST_DURATION.labels(method="POST", endpoint="/users/refresh_token").observe(time() - start_time)
-        REQUEST_TOTAL.labels(method="POST", endpoint="/users/refresh_token", status_code="200").inc()
-        return token_group
-    except NotFoundException as e:
-        REQUEST_DURATION.labels(method="POST", endpoint="/users/refresh_token").observe(time() - start_time)
-        REQUEST_TOTAL.labels(
-            method="POST",
-            endpoint="/users/refresh_token",
-            status_code=str(e.status_code),
-        ).inc()
-        raise HTTPException(status_code=e.status_code, detail=e.detail) from e
-    finally:
-        ACTIVE_CONNECTIONS.labels(app="auth_service").dec()
-
-
-@router.get("/me", response_model=User, status_code=status.HTTP_200_OK)
-@limiter.limit("5/minute")
+    return await user_service.refresh_access_token(refresh_token=request.refresh_token)
+
+
+@router.post("/logout", status_code=status.HTTP_200_OK)
+async def logout(
+    request: RefreshTokenRequest,
+    user_service: Annotated[UserService, Depends(get_user_service)],
+):
+    """
+    Отзывает refresh-токен и все токены, полученные из него ротацией.
+    """
+    await user_service.logout(refresh_token=request.refresh_token)
+    return {"success": "logged out"}
+
+
+@router.get(
+    "/me",
+    response_model=User,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(RateLimit(limiter, "5/minute"))],
+)
 async def get_me(
-    request: Request,
     user_service: Annotated[UserService, Depends(get_user_service)],
     user_email: Annotated[str, Depends(get_email_current_user)],
+    response: Response,
 ):
-    ACTIVE_CONNECTIONS.labels(app="auth_service").inc()
-    start_time = time()
-    try:
-        user = await user_service.get_user_by_email(user_email)
-        REQUEST_DURATION.labels(method="GET", endpoint="/users/me").observe(time() - start_time)
-        REQUEST_TOTAL.labels(method="GET", endpoint="/users/me", status_code="200").inc()
-        return user
-    except NotFoundException as e:
-        REQUEST_DURATION.labels(method="GET", endpoint="/users/me").observe(time() - start_time)
-        REQUEST_TOTAL.labels(method="GET", endpoint="/users/me", status_code=str(e.status_code)).inc()
-        raise HTTPException(status_code=e.status_code, detail=e.detail) from e
-    finally:
-        ACTIVE_CONNECTIONS.labels(app="auth_service").dec()
+    # Профиль меняется редко: gateway может отдавать его владельцу из кэша несколько секунд
+    response.headers["Cache-Control"] = "private, max-age=5"
+    return await user_service.get_user_by_email(user_email)
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_200_OK)
@@ -144,27 +94,18 @@ async def delete_user(
     user_email: Annotated[str, Depends(get_email_current_user)],
     user_service: Annotated[UserService, Depends(get_user_service)],
 ):
-    ACTIVE_CONNECTIONS.labels(app="auth_service").inc()
-    start_time = time()
-    try:
-        result = await user_service.delete_user(user_id=user_id, email=user_email)
-        REQUEST_DURATION.labels(method="DELETE", endpoint="/users/{user_id}").observe(time() - start_time)
-        if result:
-            REQUEST_TOTAL.labels(method="DELETE", endpoint=f"/users/{user_id}", status_code="200").inc()
-            return {"success": "user deleted"}
-        return {"failed": "user not deleted"}
-    except NotFoundException as e:
-        REQUEST_DURATION.labels(method="DELETE", endpoint="/users/{user_id}").observe(time() - start_time)
-        REQUEST_TOTAL.labels(
-            method="DELETE",
-            endpoint=f"/users/{user_id}",
-            status_code=str(e.status_code),
-        ).inc()
-        raise HTTPException(status_code=e.status_code, detail=e.detail) from e
-    finally:
-        ACTIVE_CONNECTIONS.labels(app="auth_service").dec()
+    if await user_service.delete_user(user_id=user_id, email=user_email):
+        return {"success": "user deleted"}
+    return {"failed": "user not deleted"}
+
+
+@router.get("/.well-known/jwks.json")
+async def jwks(response: Response):
+    """Публичные ключи для локальной проверки токенов в других сервисах."""
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return key_ring.jwks()
 
 
 @router.get("/metrics")
 async def metrics():
-    return Response(content=generate_latest(), media_type="text/plain")
+    return metrics_response()
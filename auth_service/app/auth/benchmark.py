@@ -0,0 +1,76 @@
+"""
+Замер скорости хеширования паролей для подбора параметров Argon2id.
+
+Печатает хеши в секунду на одно ядро (один поток) и суммарно на `--workers`
+потоков - это оценка числа логинов в секунду, которое выдержит под с таким
+PASSWORD_HASH_WORKERS. Для сравнения замеряется bcrypt, которым захешированы
+старые пароли.
+
+Запуск:
+    python -m auth_service.app.auth.benchmark [--memory-cost 19456] [--time-cost 2]
+        [--parallelism 1] [--workers 4] [--duration 5]
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pwdlib.hashers.argon2 import Argon2Hasher
+from pwdlib.hashers.bcrypt import BcryptHasher
+
+from auth_service.app.core.config import settings
+
+PASSWORD = "correct horse battery staple"
+
+
+def measure(handler, duration: float) -> int:
+    """Сколько хешей успевает посчитать один поток за `duration` секунд."""
+    count = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        handler.hash(PASSWORD)
+        count += 1
+    return count
+
+
+def hashes_per_second(handler, workers: int, duration: float) -> float:
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        started = time.perf_counter()
+        counts = list(executor.map(lambda _: measure(handler, duration), range(workers)))
+        elapsed = time.perf_counter() - started
+    return sum(counts) / elapsed
+
+
+def report(name: str, handler, workers: int, duration: float):
+    started = time.perf_counter()
+    handler.hash(PASSWORD)
+    latency_ms = (time.perf_counter() - started) * 1000
+    per_core = hashes_per_second(handler, 1, duration)
+    total = hashes_per_second(handler, workers, duration)
+    print(
+        f"{name}: {latency_ms:.1f} ms/hash, {per_core:.1f} hashes/s per core, "
+        f"{total:.1f} hashes/s on {workers} workers"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark password hashing throughput")
+    parser.add_argument("--memory-cost", type=int, default=settings.ARGON2_MEMORY_COST, help="KiB")
+    parser.add_argument("--time-cost", type=int, default=settings.ARGON2_TIME_COST)
+    parser.add_argument("--parallelism", type=int, default=settings.ARGON2_PARALLELISM)
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per measurement")
+    args = parser.parse_args()
+
+    print(f"CPU cores: {os.cpu_count()}")
+    argon2id = Argon2Hasher(
+        memory_cost=args.memory_cost, time_cost=args.time_cost, parallelism=args.parallelism
+    )
+    report(
+        f"argon2id m={args.memory_cost} t={args.time_cost} p={args.parallelism}",
+        argon2id,
+        args.workers,
+        args.duration,
+    )
+    report("bcrypt rounds=12", BcryptHasher(), args.workers, args.duration)
@@ -0,0 +1,68 @@
+import asyncio
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from auth_service.app.core.config import settings
+from auth_service.app.core.exceptions import ServiceUnavailableException
+from shared.tracing import tracer
+
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth", "Password hash operations waiting for a free worker"
+)
+PASSWORD_HASH_IN_FLIGHT = Gauge("password_hash_in_flight", "Password hash operations running on workers")
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total", "Password hash operations rejected because the queue was full"
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_duration_seconds",
+    "Time from submitting a password hash operation to its result, queueing included",
+    ["operation"],
+)
+
+
+class PasswordHashPool:
+    """
+    Ограниченный пул потоков для хеширования паролей.
+
+    Argon2 и bcrypt отпускают GIL на время вычисления хэша, поэтому потоки не блокируют
+    event loop и друг друга. Очередь ограничена `max_queue`: при всплеске логинов
+    лишние запросы сразу получают 503 вместо того, чтобы копиться в памяти.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+
+    async def run(self, operation: str, func: Callable, *args):
+        if self.pending >= self.workers + self.max_queue:
+            PASSWORD_HASH_REJECTED.inc()
+            raise ServiceUnavailableException(detail="Too many concurrent password checks, retry later")
+        self.pending += 1
+        self._report()
+        started = time.perf_counter()
+        try:
+            with tracer.span(
+                f"password_hash {operation}", child_only=True, **{"password_hash.pending": self.pending}
+            ):
+                return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            self.pending -= 1
+            self._report()
+            PASSWORD_HASH_SECONDS.labels(operation=operation).observe(time.perf_counter() - started)
+
+    def _report(self):
+        PASSWORD_HASH_IN_FLIGHT.set(min(self.pending, self.workers))
+        PASSWORD_HASH_QUEUE_DEPTH.set(max(self.pending - self.workers, 0))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hash_pool = PasswordHashPool(
+    workers=settings.PASSWORD_HASH_WORKERS, max_queue=settings.PASSWORD_HASH_MAX_QUEUE
+)
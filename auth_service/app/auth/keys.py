@@ -0,0 +1,141 @@
+"""
+Кольцо ключей подписи JWT.
+
+Асимметричные ключи лежат в JWT_KEYS_DIR в виде `<kid>.pem` (приватные ключи RSA или Ed25519).
+Активный ключ (JWT_ACTIVE_KID, по умолчанию - последний по имени файла) подписывает новые токены,
+остальные ключи каталога остаются в JWKS и принимаются при проверке - так при ротации
+старые токены живут до истечения срока. Токены без `kid` проверяются legacy-ключом
+SECRET_KEY/ALGORITHM.
+
+Ключи разбираются один раз при загрузке, jwt.encode/jwt.decode получают готовые объекты.
+
+Генерация нового ключа:
+    python -m auth_service.app.auth.keys <keys_dir> <kid> [--type rsa|ed25519]
+"""
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+
+from auth_service.app.core.config import settings
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    kid: str | None
+    algorithm: str
+    private_key: Any
+    public_key: Any
+
+
+def load_pem_key(kid: str, pem: bytes) -> SigningKey:
+    """Разбирает приватный PEM-ключ и определяет алгоритм по типу ключа."""
+    private_key = serialization.load_pem_private_key(pem, password=None)
+    if isinstance(private_key, rsa.RSAPrivateKey):
+        algorithm = "RS256"
+    elif isinstance(private_key, ed25519.Ed25519PrivateKey):
+        algorithm = "EdDSA"
+    else:
+        raise ValueError(f"Unsupported key type for kid={kid}: {type(private_key).__name__}")
+    return SigningKey(
+        kid=kid,
+        algorithm=algorithm,
+        private_key=private_key,
+        public_key=private_key.public_key(),
+    )
+
+
+class KeyRing:
+    def __init__(self, keys: list[SigningKey], active_kid: str | None, legacy_key: SigningKey):
+        self.keys: dict[str, SigningKey] = {key.kid: key for key in keys}
+        self.legacy_key = legacy_key
+        if active_kid is None:
+            self.active = legacy_key
+        elif active_kid in self.keys:
+            self.active = self.keys[active_kid]
+        else:
+            raise ValueError(f"Active key {active_kid} not found in key ring")
+        self._jwks = {"keys": [self._to_jwk(key) for key in self.keys.values()]}
+
+    @classmethod
+    def from_settings(cls) -> "KeyRing":
+        legacy_key = SigningKey(
+            kid=None,
+            algorithm=settings.ALGORITHM,
+            private_key=settings.SECRET_KEY,
+            public_key=settings.SECRET_KEY,
+        )
+        if not settings.JWT_KEYS_DIR:
+            return cls(keys=[], active_kid=None, legacy_key=legacy_key)
+
+        paths = sorted(Path(settings.JWT_KEYS_DIR).glob("*.pem"))
+        keys = [load_pem_key(path.stem, path.read_bytes()) for path in paths]
+        if not keys:
+            raise ValueError(f"No *.pem keys found in {settings.JWT_KEYS_DIR}")
+        active_kid = settings.JWT_ACTIVE_KID or keys[-1].kid
+        return cls(keys=keys, active_kid=active_kid, legacy_key=legacy_key)
+
+    @staticmethod
+    def _to_jwk(key: SigningKey) -> dict:
+        if key.algorithm == "RS256":
+            jwk = RSAAlgorithm.to_jwk(key.public_key, as_dict=True)
+        else:
+            jwk = OKPAlgorithm.to_jwk(key.public_key, as_dict=True)
+        jwk.update({"kid": key.kid, "alg": key.algorithm, "use": "sig"})
+        return jwk
+
+    def encode(self, payload: dict) -> str:
+        """Подписывает payload активным ключом."""
+        headers = {"kid": self.active.kid} if self.active.kid else None
+        return jwt.encode(payload, self.active.private_key, algorithm=self.active.algorithm, headers=headers)
+
+    def decode(self, token: str) -> dict:
+        """Проверяет токен ключом из его заголовка `kid`."""
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None:
+            key = self.legacy_key
+        else:
+            key = self.keys.get(kid)
+            if key is None:
+                raise jwt.InvalidTokenError(f"Unknown signing key: {kid}")
+        return jwt.decode(token, key.public_key, algorithms=[key.algorithm])
+
+    def jwks(self) -> dict:
+        """Публичные ключи кольца в формате JWKS."""
+        return self._jwks
+
+
+key_ring = KeyRing.from_settings()
+
+
+def generate_key(keys_dir: str, kid: str, key_type: str = "rsa") -> Path:
+    """Создаёт новый приватный ключ `<keys_dir>/<kid>.pem`."""
+    if key_type == "rsa":
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+    path = Path(keys_dir) / f"{kid}.pem"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(pem)
+    path.chmod(0o600)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a JWT signing key")
+    parser.add_argument("keys_dir")
+    parser.add_argument("kid")
+    parser.add_argument("--type", choices=["rsa", "ed25519"], default="rsa")
+    args = parser.parse_args()
+    print(generate_key(args.keys_dir, args.kid, args.type))
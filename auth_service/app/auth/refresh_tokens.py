@@ -0,0 +1,149 @@
+"""
+Хранилище семейств refresh-токенов в Redis.
+
+Вход открывает семейство, каждый refresh выдаёт следующий токен этого семейства.
+В Redis хранится только хеш jti текущего токена семейства, поэтому проверка и
+ротация - один Lua-скрипт без обращения к БД. Предъявление уже использованного
+токена семейства означает утечку: семейство отзывается целиком, и новый вход
+нужен как злоумышленнику, так и владельцу. Выход отзывает семейство, удаление
+пользователя - все его семейства. Исключение - параллельные refresh одного
+клиента: токен, заменённый меньше REFRESH_TOKEN_REUSE_GRACE_SECONDS назад,
+отклоняется без отзыва семейства.
+"""
+
+import hashlib
+import uuid
+from collections.abc import Callable
+from datetime import timedelta
+
+import redis.asyncio as redis
+from prometheus_client import Counter
+
+from auth_service.app.core.config import settings
+from auth_service.app.core.exceptions import ServiceUnavailableException
+from auth_service.app.core.redis_client import redis_client
+
+REFRESH_TOKEN_ROTATIONS = Counter(
+    "refresh_token_rotations_total",
+    "Refresh token checks by result (rotated, stale, reused, revoked)",
+    ["result"],
+)
+
+# KEYS[1] - семейство, KEYS[2] - семейства пользователя; ARGV[1] - хеш предъявленного jti,
+# ARGV[2] - хеш нового jti, ARGV[3] - TTL (мс), ARGV[4] - окно для только что заменённого токена (мс).
+ROTATE_SCRIPT = """
+local state = redis.call("HMGET", KEYS[1], "current", "previous", "rotated_at")
+if not state[1] then
+    return "revoked"
+end
+local time = redis.call("TIME")
+local now = time[1] * 1000 + math.floor(time[2] / 1000)
+if state[1] ~= ARGV[1] then
+    if state[2] == ARGV[1] and now - tonumber(state[3]) < tonumber(ARGV[4]) then
+        return "stale"
+    end
+    redis.call("DEL", KEYS[1])
+    redis.call("SREM", KEYS[2], KEYS[1])
+    return "reused"
+end
+redis.call("HSET", KEYS[1], "current", ARGV[2], "previous", ARGV[1], "rotated_at", now)
+redis.call("PEXPIRE", KEYS[1], ARGV[3])
+redis.call("PEXPIRE", KEYS[2], ARGV[3])
+return "rotated"
+"""
+
+
+def hash_token_id(jti: str) -> str:
+    return hashlib.sha256(jti.encode()).hexdigest()
+
+
+class RefreshTokenStore:
+    """
+    Семейства refresh-токенов: `family:<fid>` -> {user_id, current, previous,
+    rotated_at}, где current - хеш jti последнего выданного токена, previous -
+    заменённого им, и `user:<id>` -> множество семейств.
+
+    Redis обязателен: пока он недоступен, вход и refresh отвечают 503 - иначе
+    отозванный токен нельзя отличить от действующего.
+    """
+
+    def __init__(self, get_client: Callable[[], redis.Redis | None], ttl: timedelta, reuse_grace: timedelta):
+        self.get_client = get_client
+        self.ttl_ms = int(ttl.total_seconds() * 1000)
+        self.reuse_grace_ms = int(reuse_grace.total_seconds() * 1000)
+        self.script = None
+
+    @staticmethod
+    def family_key(family: str) -> str:
+        return f"refresh:family:{family}"
+
+    @staticmethod
+    def user_key(user_id: int) -> str:
+        return f"refresh:user:{user_id}"
+
+    def _client(self) -> redis.Redis:
+        client = self.get_client()
+        if client is None:
+            raise ServiceUnavailableException(detail="Token store is unavailable")
+        return client
+
+    async def start_family(self, user_id: int) -> tuple[str, str]:
+        """Новое семейство при входе; возвращает (fid, jti) первого токена."""
+        family, jti = uuid.uuid4().hex, uuid.uuid4().hex
+        family_key, user_key = self.family_key(family), self.user_key(user_id)
+        try:
+            async with self._client().pipeline(transaction=True) as pipe:
+                pipe.hset(family_key, mapping={"user_id": user_id, "current": hash_token_id(jti)})
+                pipe.pexpire(family_key, self.ttl_ms)
+                pipe.sadd(user_key, family_key)
+                pipe.pexpire(user_key, self.ttl_ms)
+                await pipe.execute()
+        except redis.RedisError as e:
+            raise ServiceUnavailableException(detail="Token store is unavailable") from e
+        return family, jti
+
+    async def rotate(self, user_id: int, family: str, jti: str) -> str | None:
+        """jti следующего токена семейства либо None, если токен отозван или уже использован."""
+        client = self._client()
+        if self.script is None:
+            self.script = client.register_script(ROTATE_SCRIPT)
+        new_jti = uuid.uuid4().hex
+        try:
+            result = await self.script(
+                keys=[self.family_key(family), self.user_key(user_id)],
+                args=[hash_token_id(jti), hash_token_id(new_jti), self.ttl_ms, self.reuse_grace_ms],
+                client=client,
+            )
+        except redis.RedisError as e:
+            raise ServiceUnavailableException(detail="Token store is unavailable") from e
+
+        REFRESH_TOKEN_ROTATIONS.labels(result=result).inc()
+        if result == "reused":
+            print(f"Повторное использование refresh-токена: user_id={user_id}, семейство {family} отозвано")
+        return new_jti if result == "rotated" else None
+
+    async def revoke_family(self, user_id: int, family: str):
+        try:
+            async with self._client().pipeline(transaction=True) as pipe:
+                pipe.delete(self.family_key(family))
+                pipe.srem(self.user_key(user_id), self.family_key(family))
+                await pipe.execute()
+        except redis.RedisError as e:
+            raise ServiceUnavailableException(detail="Token store is unavailable") from e
+
+    async def revoke_user(self, user_id: int):
+        """Отзывает все семейства пользователя."""
+        client = self._client()
+        user_key = self.user_key(user_id)
+        try:
+            families = await client.smembers(user_key)
+            await client.delete(user_key, *families)
+        except redis.RedisError as e:
+            raise ServiceUnavailableException(detail="Token store is unavailable") from e
+
+
+refresh_token_store = RefreshTokenStore(
+    lambda: redis_client.client,
+    ttl=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    reuse_grace=timedelta(seconds=settings.REFRESH_TOKEN_REUSE_GRACE_SECONDS),
+)
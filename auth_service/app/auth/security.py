@@ -3,17 +3,33 @@ from datetime import UTC, datetime, timedelta
 import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+from pwdlib.hashers.bcrypt import BcryptHasher
 
+from auth_service.app.auth.hashing import password_hash_pool
+from auth_service.app.auth.keys import key_ring
 from auth_service.app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Первый хешер - текущий (Argon2id), bcrypt только проверяет старые хеши
+pwd_context = PasswordHash(
+    (
+        Argon2Hasher(
+            memory_cost=settings.ARGON2_MEMORY_COST,
+            time_cost=settings.ARGON2_TIME_COST,
+            parallelism=settings.ARGON2_PARALLELISM,
+        ),
+        BcryptHasher(),
+    )
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/token")
 
+REFRESH_CLAIMS = ("sub", "id", "fid", "jti")
+
 
 def hash_password(password: str) -> str:
     """
-    Преобразует пароль в хеш с использованием bcrypt.
+    Преобразует пароль в хеш с использованием Argon2id.
     """
     return pwd_context.hash(password)
 
@@ -25,28 +41,62 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Проверяет пароль и, если хеш устарел (bcrypt или старые параметры Argon2),
+    возвращает новый хеш для сохранения.
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Хеширует пароль в пуле потоков, не блокируя event loop.
+    """
+    return await password_hash_pool.run("hash", hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Проверяет пароль в пуле потоков, не блокируя event loop.
+    """
+    return await password_hash_pool.run("verify", verify_password, plain_password, hashed_password)
+
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """
+    Проверяет пароль с перехешированием в пуле потоков, не блокируя event loop.
+    """
+    return await password_hash_pool.run("verify", verify_and_update_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict):
     """
     Создаёт JWT.
     """
     to_encode = data.copy()
     expire = datetime.now(UTC) + timedelta(minutes=int(settings.ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    to_encode.update({"exp": expire, "type": "access"})
+    return key_ring.encode(to_encode)
 
 
-def create_refresh_token(data: dict):
+def create_refresh_token(data: dict, expire: datetime | None = None):
     """
     Создаёт рефреш-токен с длительным сроком действия.
     """
     to_encode = data.copy()
-    expire = datetime.now(UTC) + timedelta(days=int(settings.REFRESH_TOKEN_EXPIRE_DAYS))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    if expire is None:
+        expire = datetime.now(UTC) + timedelta(days=int(settings.REFRESH_TOKEN_EXPIRE_DAYS))
+    to_encode.update({"exp": expire, "type": "refresh"})
+    return key_ring.encode(to_encode)
 
 
-async def get_email_refresh_access_token(refresh_token: str):
-    """Обновляет access token"""
+def decode_refresh_token(refresh_token: str) -> dict:
+    """
+    Проверяет refresh-токен и возвращает его claims: sub, id, fid (семейство) и jti.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate refresh token",
@@ -54,14 +104,12 @@ async def get_email_refresh_access_token(refresh_token: str):
     )
 
     try:
-        payload = jwt.decode(refresh_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email = payload.get("sub")
-        if email is None:
-            raise credentials_exception
+        payload = key_ring.decode(refresh_token)
     except jwt.PyJWTError as e:
         raise credentials_exception from e
-
-    return email
+    if payload.get("type") != "refresh" or any(payload.get(claim) is None for claim in REFRESH_CLAIMS):
+        raise credentials_exception
+    return payload
 
 
 async def get_email_current_user(token: str = Depends(oauth2_scheme)):
@@ -74,9 +122,9 @@ async def get_email_current_user(token: str = Depends(oauth2_scheme)):
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = key_ring.decode(token)
         email: str = payload.get("sub")
-        if email is None:
+        if email is None or payload.get("type") == "refresh":
             raise credential_exception
     except jwt.ExpiredSignatureError as exc:
         raise HTTPException(
@@ -1,9 +1,13 @@
 from functools import lru_cache
+from typing import Literal
 
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic_settings import SettingsConfigDict
 
+from shared.database import DatabaseSettings
+from shared.redis_client import RedisSettings
 
-class Settings(BaseSettings):
+
+class Settings(DatabaseSettings, RedisSettings):
     POSTGRES_AUTH_DB_URL: str
     POSTGRES_AUTH_USER: str
     POSTGRES_AUTH_PASSWORD: str
@@ -12,9 +16,37 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_DAYS: int
+    # Сколько секунд только что заменённый refresh-токен отклоняется без отзыва семейства
+    # (параллельные refresh одного клиента), а не считается повторным использованием
+    REFRESH_TOKEN_REUSE_GRACE_SECONDS: float = 10.0
+    # Каталог с асимметричными ключами `<kid>.pem`; без него токены подписываются SECRET_KEY
+    JWT_KEYS_DIR: str | None = None
+    JWT_ACTIVE_KID: str | None = None
+    # Параметры Argon2id: память в KiB, число проходов и потоков на один хеш
+    ARGON2_MEMORY_COST: int = 19456
+    ARGON2_TIME_COST: int = 2
+    ARGON2_PARALLELISM: int = 1
+    # Потоки для хеширования паролей и сколько операций может ждать свободный поток, прежде чем вернуть 503
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    # Кэш email -> пользователь: TTL в Redis, TTL отсутствующего пользователя и
+    # локальный кэш процесса (за его TTL удаление доходит до других реплик), секунды
+    USER_CACHE_TTL: int = 300
+    USER_CACHE_NEGATIVE_TTL: int = 30
+    USER_CACHE_LOCAL_TTL: float = 2.0
+    USER_CACHE_LOCAL_MAX_SIZE: int = 10000
+    # Сети прокси (CIDR), от которых принимается X-Forwarded-For для лимитов запросов,
+    # например ["172.16.0.0/12"] для gateway в сети docker; пусто - лимит по адресу соединения
+    TRUSTED_PROXIES: list[str] = []
     RABBITMQ_URL: str
     RABBITMQ_DEFAULT_USER: str
     RABBITMQ_DEFAULT_PASS: str
+    # single - каждый токен отдельным запросом в БД; batch - пачки токенов одним запросом
+    RPC_CONSUMER_MODE: Literal["single", "batch"] = "single"
+    RPC_PREFETCH_COUNT: int = 1
+    RPC_CONSUMER_CONCURRENCY: int = 1
+    RPC_BATCH_WINDOW_MS: int = 5
+    RPC_BATCH_MAX_SIZE: int = 100
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
@@ -0,0 +1,72 @@
+# pylint:disable=broad-exception-caught
+import asyncio
+import json
+
+import aio_pika
+from aio_pika.abc import AbstractExchange, AbstractRobustConnection
+
+from auth_service.app.core.config import settings
+from shared.tracing import tracer
+
+USER_EVENTS_EXCHANGE = "user_events"
+
+
+class UserEventPublisher:
+    """
+    Публикует события жизненного цикла пользователей в fanout-exchange `user_events`.
+
+    Рассылка событий - best effort: сервис стартует и без RabbitMQ, `run` из lifespan
+    подключается в фоне с растущей задержкой, а до подключения события пропускаются.
+    """
+
+    def __init__(self, amqp_url: str = settings.RABBITMQ_URL):
+        self.amqp_url = amqp_url
+        self.connection: AbstractRobustConnection | None = None
+        self.exchange: AbstractExchange | None = None
+
+    async def connect(self):
+        connection = await aio_pika.connect_robust(self.amqp_url)
+        try:
+            channel = await connection.channel()
+            exchange = await channel.declare_exchange(
+                USER_EVENTS_EXCHANGE, aio_pika.ExchangeType.FANOUT, durable=True
+            )
+        except Exception:
+            await connection.close()
+            raise
+        self.connection, self.exchange = connection, exchange
+
+    async def run(self, max_delay: float = 30.0):
+        """Фоновая задача из lifespan: подключается, пока RabbitMQ не станет доступен."""
+        delay = 0.5
+        while self.exchange is None:
+            try:
+                await self.connect()
+            except Exception as e:
+                print(f"RabbitMQ недоступен, события пользователей не отправляются: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, max_delay)
+
+    async def close(self):
+        if self.connection and not self.connection.is_closed:
+            await self.connection.close()
+
+    async def publish(self, event_type: str, payload: dict):
+        if not self.exchange:
+            print(f"Событие {event_type} не отправлено: нет соединения с RabbitMQ")
+            return
+        try:
+            await self.exchange.publish(
+                aio_pika.Message(
+                    body=json.dumps(payload).encode(), type=event_type, headers=dict(tracer.headers())
+                ),
+                routing_key="",
+            )
+        except Exception as e:
+            print(f"Не удалось отправить событие {event_type}: {e}")
+
+    async def user_deleted(self, user_id: int):
+        await self.publish("user.deleted", {"user_id": user_id})
+
+
+user_events = UserEventPublisher()
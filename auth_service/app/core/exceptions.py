@@ -29,6 +29,16 @@ class BusinessException(AppException):
         super().__init__(status_code=status_code, detail=detail)
 
 
+class ServiceUnavailableException(AppException):
+    def __init__(
+        self,
+        status_code: int = status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail: str = "Service temporarily unavailable",
+        retry_after: int = 1,
+    ):
+        super().__init__(status_code=status_code, detail=detail, headers={"Retry-After": str(retry_after)})
+
+
 class UnauthorizedException(HTTPException):
     def __init__(
         self,
@@ -1,6 +1,9 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from auth_service.app.core.config import settings
+from auth_service.app.core.redis_client import redis_client
+from shared.rate_limit import ClientIP, RateLimiter
 
-limiter = Limiter(
-    key_func=get_remote_address,
+limiter = RateLimiter(
+    lambda: redis_client.client,
+    prefix="rate:auth_service",
+    key_func=ClientIP(settings.TRUSTED_PROXIES),
 )
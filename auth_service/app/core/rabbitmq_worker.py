@@ -1,5 +1,6 @@
 # pylint:disable=broad-exception-caught
 import asyncio
+import time
 
 import aio_pika
 from aio_pika.abc import (
@@ -13,29 +14,138 @@ from auth_service.app.core.config import settings
 from auth_service.app.core.database import async_session_maker
 from auth_service.app.repositories.users import UserRepository
 from auth_service.app.services.users import UserService
+from shared.tracing import SpanContext, parse_traceparent, tracer
 
 RABBITMQ_URL = settings.RABBITMQ_URL
+RPC_SPAN = "rpc token_check_queue"
 
 
-async def process_get_user_id_by_token(message: AbstractIncomingMessage, default_exchange: AbstractExchange):
+def trace_parent(message: AbstractIncomingMessage) -> SpanContext | None:
+    """Контекст трассы из headers сообщения, если отправитель его передал."""
+    return parse_traceparent((message.headers or {}).get("traceparent"))
+
+
+async def reply(message: AbstractIncomingMessage, default_exchange: AbstractExchange, user_id: int | None):
+    """Отправляет ответ на RPC-запрос; пустое тело означает невалидный токен."""
+    if message.reply_to and message.correlation_id:
+        body = str(user_id).encode() if user_id else b""
+        await default_exchange.publish(
+            aio_pika.Message(body=body, correlation_id=message.correlation_id),
+            routing_key=message.reply_to,
+        )
+
+
+async def process_get_user_id_by_token(
+    message: AbstractIncomingMessage,
+    default_exchange: AbstractExchange,
+    semaphore: asyncio.Semaphore,
+):
     """Обрабатывает входящий RPC-запрос на получение id по access токену"""
-    async with message.process():
+    async with semaphore, message.process():
+        user_id = None
+        with tracer.span(RPC_SPAN, kind="server", parent=trace_parent(message)) as span:
+            try:
+                token = message.body.decode("utf-8")
+                email = await get_email_current_user(token=token)
+                async with async_session_maker() as db:
+                    repo = UserRepository(db=db)
+                    service = UserService(user_repo=repo)
+                    user = await service.get_user_by_email(email=email)
+                    user_id = user.id
+            except Exception as e:
+                print(f"Error in during handle message: {e}")
+                span.record_error(e)
+
+            await reply(message, default_exchange, user_id)
+
+
+class TokenBatchProcessor:
+    """
+    Микро-батчинг RPC-запросов проверки токена.
+
+    Токены, пришедшие в течение `window` секунд (или пока не наберётся `max_size`),
+    разрешаются одним запросом `WHERE email IN (...)`, ответы расходятся по correlation_id.
+    Одновременно выполняется не больше `concurrency` пачек.
+    """
+
+    def __init__(self, default_exchange: AbstractExchange, window: float, max_size: int, concurrency: int):
+        self.default_exchange = default_exchange
+        self.window = window
+        self.max_size = max_size
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.pending: list[tuple[AbstractIncomingMessage, str | None, int]] = []
+        self.timer: asyncio.TimerHandle | None = None
+        self.tasks: set[asyncio.Task] = set()
+
+    async def submit(self, message: AbstractIncomingMessage):
         try:
-            token = message.body.decode("utf-8")
-            email = await get_email_current_user(token=token)
-            async with async_session_maker() as db:
-                repo = UserRepository(db=db)
-                service = UserService(user_repo=repo)
-                user = await service.get_user_by_email(email=email)
-                user_id = str(user.id)
-        except Exception as e:
-            print(f"Error in during handle message: {e}")
-
-        if message.reply_to and message.correlation_id:
-            await default_exchange.publish(
-                aio_pika.Message(body=user_id.encode(), correlation_id=message.correlation_id),
-                routing_key=message.reply_to,
-            )
+            email = await get_email_current_user(token=message.body.decode("utf-8"))
+        except Exception:
+            email = None
+
+        self.pending.append((message, email, time.time_ns()))
+        if len(self.pending) >= self.max_size:
+            self.flush()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        task = asyncio.create_task(self.process_batch(batch))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def drain(self, timeout: float = 5.0):
+        """При остановке: отправляет накопленную пачку и ждёт обработки начатых, не дольше `timeout`."""
+        self.flush()
+        if self.tasks:
+            await asyncio.wait(self.tasks, timeout=timeout)
+
+    async def process_batch(self, batch: list[tuple[AbstractIncomingMessage, str | None, int]]):
+        # Спан каждого сообщения - от получения до ответа, чтобы в трассе было видно ожидание пачки;
+        # запрос в БД - в спане первого сообщения пачки
+        spans = [
+            tracer.start_span(RPC_SPAN, kind="server", parent=trace_parent(message), start_ns=received)
+            for message, _, received in batch
+        ]
+        async with self.semaphore:
+            emails = {email for _, email, _ in batch if email}
+            user_ids: dict[str, int] = {}
+            if emails:
+                parent = spans[0].context if spans[0] else None
+                with tracer.span("token_check_batch", parent=parent, **{"messaging.batch.size": len(batch)}):
+                    try:
+                        async with async_session_maker() as db:
+                            user_ids = await UserRepository(db=db).get_ids_by_emails(emails)
+                    except Exception as e:
+                        print(f"Error in during handle batch: {e}")
+
+            for (message, email, _), span in zip(batch, spans, strict=True):
+                try:
+                    await reply(message, self.default_exchange, user_ids.get(email))
+                    await message.ack()
+                except Exception as e:
+                    print(f"Error in during reply: {e}")
+                tracer.end_span(span)
+
+
+def prefetch_count() -> int:
+    """
+    prefetch канала. В режиме batch брокер должен отдавать сразу по пачке на каждую
+    одновременную обработку - иначе при RPC_PREFETCH_COUNT=1 пачки из одного сообщения
+    только ждали бы окно RPC_BATCH_WINDOW_MS.
+    """
+    if settings.RPC_CONSUMER_MODE != "batch":
+        return settings.RPC_PREFETCH_COUNT
+    required = settings.RPC_BATCH_MAX_SIZE * settings.RPC_CONSUMER_CONCURRENCY
+    if settings.RPC_PREFETCH_COUNT < required:
+        print(f"RPC_PREFETCH_COUNT={settings.RPC_PREFETCH_COUNT} меньше пачки, используется {required}")
+    return max(settings.RPC_PREFETCH_COUNT, required)
 
 
 async def run_consumer():
@@ -45,12 +155,32 @@ async def run_consumer():
         connection = await aio_pika.connect_robust(RABBITMQ_URL)
         async with connection:
             channel = await connection.channel()
-            await channel.set_qos(prefetch_count=1)
+            await channel.set_qos(prefetch_count=prefetch_count())
             default_exchange = channel.default_exchange
             queue = await channel.declare_queue("token_check_queue")
-            await queue.consume(lambda message: process_get_user_id_by_token(message, default_exchange))
 
-            await asyncio.Future()
+            batcher: TokenBatchProcessor | None = None
+            if settings.RPC_CONSUMER_MODE == "batch":
+                batcher = TokenBatchProcessor(
+                    default_exchange=default_exchange,
+                    window=settings.RPC_BATCH_WINDOW_MS / 1000,
+                    max_size=settings.RPC_BATCH_MAX_SIZE,
+                    concurrency=settings.RPC_CONSUMER_CONCURRENCY,
+                )
+                consumer_tag = await queue.consume(batcher.submit)
+            else:
+                semaphore = asyncio.Semaphore(settings.RPC_CONSUMER_CONCURRENCY)
+                consumer_tag = await queue.consume(
+                    lambda message: process_get_user_id_by_token(message, default_exchange, semaphore)
+                )
+
+            try:
+                await asyncio.Future()
+            finally:
+                # Новые сообщения больше не принимаются, уже полученные отвечаются до закрытия канала
+                if batcher is not None:
+                    await queue.cancel(consumer_tag)
+                    await batcher.drain()
     except asyncio.CancelledError:
         print("Получен сигнал отмены, consumer завершает работу.")
     finally:
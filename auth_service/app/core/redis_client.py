@@ -0,0 +1,4 @@
+from auth_service.app.core.config import settings
+from shared.redis_client import RedisClient
+
+redis_client = RedisClient(settings)
@@ -0,0 +1,109 @@
+from collections.abc import Awaitable, Callable, Iterable
+
+import redis.asyncio as redis
+from prometheus_client import Counter
+
+from auth_service.app.core.config import settings
+from auth_service.app.core.redis_client import redis_client
+from auth_service.app.schemas.users import User
+from shared.lru import TTLCache
+
+KEY_PREFIX = "user_identity"
+# Отрицательная запись: пользователя с таким email нет или он удалён
+MISSING = ""
+
+USER_CACHE_REQUESTS = Counter(
+    "user_cache_requests_total",
+    "Email -> user lookups by result (local_hit, hit, miss, error)",
+    ["result"],
+)
+
+
+class UserCache:
+    """
+    Двухуровневый кэш email -> пользователь (id, email, is_active): LRU в памяти
+    процесса с коротким TTL и общий Redis.
+
+    Отсутствующие пользователи тоже кэшируются, на меньший срок. Запись из БД
+    кладётся через SET NX, а create/delete репозитория перезаписывают ключ
+    безусловно - поэтому чтение, начавшееся до удаления, не вернёт в кэш
+    удалённого пользователя. Другие реплики видят изменение после истечения
+    своего локального TTL (USER_CACHE_LOCAL_TTL).
+    """
+
+    def __init__(self, ttl: int, negative_ttl: int, local_ttl: float, local_size: int):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.local = TTLCache(maxsize=local_size, ttl=local_ttl)
+
+    @staticmethod
+    def key(email: str) -> str:
+        return f"{KEY_PREFIX}:{email}"
+
+    @staticmethod
+    def decode(value: str) -> User | None:
+        return User.model_validate_json(value) if value else None
+
+    async def get_or_load(self, email: str, loader: Callable[[str], Awaitable[User | None]]) -> User | None:
+        cached = await self.get_many([email])
+        if email in cached:
+            return cached[email]
+        user = await loader(email)
+        await self.store(email, user, overwrite=False)
+        return user
+
+    async def get_many(self, emails: Iterable[str]) -> dict[str, User | None]:
+        """Закэшированные записи; email без записи в результат не попадают."""
+        result: dict[str, User | None] = {}
+        remote: list[str] = []
+        for email in emails:
+            entry = self.local.get(email)
+            if entry is None:
+                remote.append(email)
+            else:
+                USER_CACHE_REQUESTS.labels(result="local_hit").inc()
+                result[email] = entry or None
+        if not remote:
+            return result
+
+        values: list[str | None] = [None] * len(remote)
+        if redis_client.client:
+            try:
+                values = await redis_client.client.mget([self.key(email) for email in remote])
+            except redis.RedisError as e:
+                print(f"Ошибка чтения кэша пользователей: {e}")
+                USER_CACHE_REQUESTS.labels(result="error").inc(len(remote))
+        for email, value in zip(remote, values, strict=True):
+            if value is None:
+                USER_CACHE_REQUESTS.labels(result="miss").inc()
+                continue
+            USER_CACHE_REQUESTS.labels(result="hit").inc()
+            result[email] = self.decode(value)
+            self.local.set(email, result[email] or MISSING)
+        return result
+
+    async def store(self, email: str, user: User | None, *, overwrite: bool = True):
+        """
+        Записывает пользователя (None - отсутствует). overwrite=False - для данных
+        из БД: не затирает запись, которую успели положить create/delete.
+        """
+        value = user.model_dump_json() if user else MISSING
+        stored = True
+        if redis_client.client:
+            ttl = self.ttl if user else self.negative_ttl
+            try:
+                stored = await redis_client.client.set(self.key(email), value, ex=ttl, nx=not overwrite)
+            except redis.RedisError as e:
+                print(f"Ошибка записи кэша пользователей: {e}")
+
+        # SET NX не прошёл - в Redis более свежая запись, её подхватит следующее чтение
+        if stored:
+            self.local.set(email, user or MISSING)
+
+
+user_cache = UserCache(
+    ttl=settings.USER_CACHE_TTL,
+    negative_ttl=settings.USER_CACHE_NEGATIVE_TTL,
+    local_ttl=settings.USER_CACHE_LOCAL_TTL,
+    local_size=settings.USER_CACHE_LOCAL_MAX_SIZE,
+)
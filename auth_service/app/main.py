@@ -2,26 +2,41 @@
 import asyncio
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
 
 from auth_service.app.api.routers.users import router as user_router
+from auth_service.app.auth.hashing import password_hash_pool
+from auth_service.app.core.events import user_events
 from auth_service.app.core.limiter import limiter
 from auth_service.app.core.rabbitmq_worker import run_consumer
+from auth_service.app.core.redis_client import redis_client
+from shared.metrics import PrometheusMiddleware
+from shared.rate_limit import RateLimit
+from shared.tracing import TracingMiddleware, setup_tracing
+
+setup_tracing("auth_service")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    await redis_client.connect()
+    redis_monitor = asyncio.create_task(redis_client.monitor())
+    events_task = asyncio.create_task(user_events.run())
     consumer_task = asyncio.create_task(run_consumer())
     yield
+    # Consumer - первым: при остановке он дообрабатывает полученные сообщения, нужны БД и Redis
     consumer_task.cancel()
     try:
         await consumer_task
     except asyncio.CancelledError:
         print("Consumer RabbitMQ успешно остановлен.")
+    events_task.cancel()
+    await user_events.close()
+    redis_monitor.cancel()
+    await redis_client.close()
+    password_hash_pool.shutdown()
 
 
 app = FastAPI(
@@ -30,9 +45,6 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -40,13 +52,14 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(PrometheusMiddleware, service="auth_service", exclude=("/users/metrics",))
+app.add_middleware(TracingMiddleware, exclude=("/users/metrics",))
 
 
 app.include_router(user_router)
 
 
-@app.get("/")
-@limiter.limit("10/minute")
-async def read_index(request: Request):
+@app.get("/", dependencies=[Depends(RateLimit(limiter, "10/minute"))])
+async def read_index():
     # Возвращаем главную HTML страницу
     return FileResponse("index.html")
@@ -3,14 +3,17 @@
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from auth_service.app.auth.security import hash_password, verify_password
+from auth_service.app.auth.security import hash_password_async, verify_and_update_password_async
+from auth_service.app.core.events import user_events
+from auth_service.app.core.user_cache import UserCache, user_cache
 from auth_service.app.models.users import User as UserModel
-from auth_service.app.schemas.users import UserCreate
+from auth_service.app.schemas.users import User, UserCreate
 
 
 class UserRepository:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, cache: UserCache = user_cache):
         self.db = db
+        self.cache = cache
 
     async def get_by_id(self, user_id: int) -> UserModel | None:
         """
@@ -32,18 +35,51 @@ class UserRepository:
         user = result.first()
         return user
 
+    async def get_identity(self, email: str) -> User | None:
+        """
+        Получает id, email и is_active активного пользователя по email через кэш
+        """
+        return await self.cache.get_or_load(email, self._load_identity)
+
+    async def _load_identity(self, email: str) -> User | None:
+        user = await self.get_user_by_email(email)
+        return User.model_validate(user) if user else None
+
+    async def get_ids_by_emails(self, emails: set[str]) -> dict[str, int]:
+        """
+        Получает id активных пользователей по набору email: из кэша, остальных - одним запросом
+        """
+        cached = await self.cache.get_many(emails)
+        ids = {email: user.id for email, user in cached.items() if user}
+        missing = emails - cached.keys()
+        if not missing:
+            return ids
+
+        result = await self.db.execute(
+            select(UserModel.email, UserModel.id).where(
+                UserModel.email.in_(missing), UserModel.is_active == True
+            )
+        )
+        loaded = dict(result.tuples().all())
+        for email in missing:
+            user_id = loaded.get(email)
+            user = User(id=user_id, email=email, is_active=True) if user_id else None
+            await self.cache.store(email, user, overwrite=False)
+        return ids | loaded
+
     async def create(self, user: UserCreate) -> UserModel:
         """
         Регистрирует нового пользователя
         """
         db_user = UserModel(
             email=user.email,
-            hashed_password=hash_password(user.password),
+            hashed_password=await hash_password_async(user.password),
         )
 
         self.db.add(db_user)
         await self.db.commit()
         await self.db.refresh(db_user)
+        await self.cache.store(db_user.email, User.model_validate(db_user))
         return db_user
 
     async def delete(self, user_id: int) -> bool:
@@ -51,15 +87,29 @@ class UserRepository:
         Мягкое удаление пользователя.
         """
         result = await self.db.execute(
-            update(UserModel).where(UserModel.id == user_id).values(is_active=False)
+            update(UserModel)
+            .where(UserModel.id == user_id)
+            .values(is_active=False)
+            .returning(UserModel.email)
         )
+        emails = result.scalars().all()
         await self.db.commit()
-        return result.rowcount > 0
+        for email in emails:
+            await self.cache.store(email, None)
+        if emails:
+            await user_events.user_deleted(user_id)
+        return bool(emails)
 
     async def authenticate(self, email: str, password: str):
-        """Аутентифицирует пользователя"""
+        """Аутентифицирует пользователя, перехешируя устаревший хеш пароля"""
         user = await self.get_user_by_email(email)
+        if not user:
+            return None
 
-        if not user or not verify_password(password, user.hashed_password):
+        valid, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+        if not valid:
             return None
+        if new_hash:
+            user.hashed_password = new_hash
+            await self.db.commit()
         return user
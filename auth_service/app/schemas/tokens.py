@@ -4,7 +4,7 @@ from pydantic import BaseModel, Field
 
 
 class RefreshTokenBase(BaseModel):
-    token: str = Field(min_length=40, max_length=200)
+    token: str = Field(min_length=40, max_length=2048)
     user_id: int
     expires_at: datetime
 
@@ -1,26 +1,29 @@
 # ruff: noqa: E712
 from datetime import UTC, datetime, timedelta
 
+from auth_service.app.auth.refresh_tokens import RefreshTokenStore, refresh_token_store
 from auth_service.app.auth.security import (
     create_access_token,
     create_refresh_token,
-    get_email_refresh_access_token,
+    decode_refresh_token,
 )
 from auth_service.app.core.config import settings
 from auth_service.app.core.exceptions import (
     BusinessException,
     ConflictException,
     NotFoundException,
+    UnauthorizedException,
 )
 from auth_service.app.models.users import User as UserModel
 from auth_service.app.repositories.users import UserRepository
 from auth_service.app.schemas.tokens import RefreshTokenBase, TokenGroup
-from auth_service.app.schemas.users import UserCreate
+from auth_service.app.schemas.users import User, UserCreate
 
 
 class UserService:
-    def __init__(self, user_repo: UserRepository):
+    def __init__(self, user_repo: UserRepository, token_store: RefreshTokenStore = refresh_token_store):
         self.user_repo = user_repo
+        self.token_store = token_store
 
     async def get_user(self, user_id: int) -> UserModel | None:
         user_db = await self.user_repo.get_by_id(user_id)
@@ -28,8 +31,8 @@ class UserService:
             raise NotFoundException(f"User with id {user_id} not found")
         return user_db
 
-    async def get_user_by_email(self, email: str) -> UserModel | None:
-        user_db = await self.user_repo.get_user_by_email(email)
+    async def get_user_by_email(self, email: str) -> User:
+        user_db = await self.user_repo.get_identity(email)
         if not user_db:
             raise NotFoundException("User with this email not found")
         return user_db
@@ -42,11 +45,13 @@ class UserService:
         return user_db
 
     async def delete_user(self, user_id: int, email) -> bool:
-        user_db = self.user_repo.get_user_by_email(email=email)
+        user_db = await self.user_repo.get_identity(email)
         if not user_db:
             raise NotFoundException(f"User with id {user_id} not found")
         if user_db.id != user_id:
             raise BusinessException("Don't have such permission")
+        # Сначала отзываем refresh-токены: если Redis недоступен, пользователь не удаляется
+        await self.token_store.revoke_user(user_id)
         return await self.user_repo.delete(user_id)
 
     async def authenticate_user(self, email: str, password: str) -> UserModel | None:
@@ -55,18 +60,34 @@ class UserService:
             raise BusinessException("email or password wrong")
         return authed_user
 
-    async def refresh_access_token(self, refresh_token: str) -> dict:
-        email = await get_email_refresh_access_token(refresh_token=refresh_token)
-        user = await self.get_user_by_email(email)
-        if not user:
-            raise NotFoundException("User with this email not found")
-        access_token = create_access_token(data={"sub": user.email, "id": user.id})
-        new_refresh_token = create_refresh_token(data={"sub": user.email, "id": user.id})
+    async def issue_tokens(self, user: UserModel) -> TokenGroup:
+        """Токены при входе: новое семейство refresh-токенов."""
+        family, jti = await self.token_store.start_family(user.id)
+        return self._token_group(user.id, user.email, family, jti)
 
-        refresh_token_schema = RefreshTokenBase(
-            token=new_refresh_token,
-            user_id=user.id,
-            expires_at=datetime.now(UTC) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
-        )
+    async def refresh_access_token(self, refresh_token: str) -> TokenGroup:
+        """
+        Ротация refresh-токена. Пользователь не читается из БД: при удалении
+        его семейства отзываются, и ротация не проходит.
+        """
+        payload = decode_refresh_token(refresh_token)
+        new_jti = await self.token_store.rotate(payload["id"], payload["fid"], payload["jti"])
+        if new_jti is None:
+            raise UnauthorizedException(detail="Refresh token is no longer valid")
+        return self._token_group(payload["id"], payload["sub"], payload["fid"], new_jti)
+
+    async def logout(self, refresh_token: str):
+        """Отзывает семейство, к которому относится refresh-токен."""
+        payload = decode_refresh_token(refresh_token)
+        await self.token_store.revoke_family(payload["id"], payload["fid"])
 
-        return TokenGroup(access_token=access_token, refresh_token=refresh_token_schema)
+    @staticmethod
+    def _token_group(user_id: int, email: str, family: str, jti: str) -> TokenGroup:
+        expires_at = datetime.now(UTC) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        refresh_token = create_refresh_token(
+            data={"sub": email, "id": user_id, "fid": family, "jti": jti}, expire=expires_at
+        )
+        return TokenGroup(
+            access_token=create_access_token(data={"sub": email, "id": user_id}),
+            refresh_token=RefreshTokenBase(token=refresh_token, user_id=user_id, expires_at=expires_at),
+        )
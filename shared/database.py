@@ -0,0 +1,179 @@
+# pylint:disable=unused-argument,too-many-positional-arguments
+"""
+Настройка асинхронного движка SQLAlchemy, общая для сервисов.
+
+Пул, таймауты и кэш подготовленных выражений задаются полями DB_* из Settings
+сервиса. Вместо echo медленные запросы пишутся в лог одной JSON-строкой, а
+ожидание соединения из пула и его заполненность экспортируются в Prometheus.
+"""
+
+import json
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from pydantic_settings import BaseSettings
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from shared.tracing import tracer
+
+DB_POOL_CHECKOUT = Histogram(
+    "db_pool_checkout_seconds",
+    "Time to get a connection from the pool, including opening a new one",
+    ["service"],
+    buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0],
+)
+DB_POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Checkouts that timed out waiting", ["service"])
+DB_POOL_PERSISTENT = Gauge("db_pool_size", "Persistent connections the pool keeps", ["service"])
+DB_POOL_MAX = Gauge("db_pool_max_connections", "Pool size plus allowed overflow", ["service"])
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out_connections", "Connections in use", ["service"])
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow_connections", "Connections above the pool size", ["service"])
+DB_SLOW_QUERIES = Counter("db_slow_queries_total", "Statements slower than DB_SLOW_QUERY_MS", ["service"])
+
+
+class DatabaseSettings(BaseSettings):
+    """Настройки движка БД, общие для сервисов: Settings сервиса наследуется от них."""
+
+    # Логировать каждый SQL-запрос (только для отладки)
+    DB_ECHO: bool = False
+    # Пул: постоянные соединения, сколько можно открыть сверх них и ожидание свободного, секунды
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 5.0
+    # Пересоздавать соединения старше DB_POOL_RECYCLE секунд; проверять соединение перед выдачей
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Кэш подготовленных выражений на соединение; 0 - выключен (нужно за pgbouncer в режиме transaction)
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Предельное время выполнения запроса в PostgreSQL, мс; 0 - без ограничения
+    DB_STATEMENT_TIMEOUT_MS: int = 30000
+    # Запросы дольше порога пишутся в лог, мс; 0 - не писать
+    DB_SLOW_QUERY_MS: int = 200
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Пул, который замеряет ожидание соединения и считает таймауты."""
+
+    service = "unknown"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.labels(service=self.service).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT.labels(service=self.service).observe(time.perf_counter() - start)
+
+
+def _log_slow_queries(engine: AsyncEngine, service: str, threshold_ms: int):
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+        if duration_ms < threshold_ms:
+            return
+        DB_SLOW_QUERIES.labels(service=service).inc()
+        # Параметры не логируются: в них бывают email и хеши паролей
+        record = {
+            "event": "slow_query",
+            "service": service,
+            "duration_ms": round(duration_ms, 1),
+            "rows": cursor.rowcount,
+            "executemany": executemany,
+            "statement": " ".join(statement.split())[:2000],
+        }
+        print(json.dumps(record, ensure_ascii=False))
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        # Запрос с ошибкой не доходит до after_cursor_execute
+        starts = context.connection.info.get("query_start") if context.connection else None
+        if starts:
+            starts.pop()
+
+
+def _trace_queries(engine: AsyncEngine):
+    """Спан на каждый запрос внутри идущей трассы."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not tracer.enabled:
+            return
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+        span = tracer.start_span(
+            f"db {operation}",
+            kind="client",
+            child_only=True,
+            attributes={"db.system": "postgresql", "db.statement": " ".join(statement.split())[:1000]},
+        )
+        conn.info.setdefault("query_spans", []).append(span)
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("query_spans")
+        if spans:
+            span = spans.pop()
+            if span is not None:
+                span.set_attribute("db.rows", cursor.rowcount)
+            tracer.end_span(span)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        spans = context.connection.info.get("query_spans") if context.connection else None
+        if spans:
+            span = spans.pop()
+            if span is not None:
+                span.record_error(context.original_exception)
+            tracer.end_span(span)
+
+
+def create_engine(url: str, settings: DatabaseSettings, service: str) -> AsyncEngine:
+    """Движок с пулом и таймаутами из настроек; `service` - метка метрик и application_name."""
+    server_settings = {"application_name": service}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+
+    pool_class = type("InstrumentedPool", (InstrumentedPool,), {"service": service})
+    engine = create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        poolclass=pool_class,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            # Кэш SQLAlchemy и собственный кэш asyncpg
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "server_settings": server_settings,
+        },
+    )
+
+    # Пул читается через engine при каждом сборе метрик: после dispose() движок создаёт новый
+    def checked_out() -> int:
+        return engine.sync_engine.pool.checkedout()
+
+    def overflow() -> int:
+        return max(0, engine.sync_engine.pool.overflow())
+
+    DB_POOL_PERSISTENT.labels(service=service).set(settings.DB_POOL_SIZE)
+    DB_POOL_MAX.labels(service=service).set(settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+    DB_POOL_CHECKED_OUT.labels(service=service).set_function(checked_out)
+    DB_POOL_OVERFLOW.labels(service=service).set_function(overflow)
+
+    if settings.DB_SLOW_QUERY_MS:
+        _log_slow_queries(engine, service, settings.DB_SLOW_QUERY_MS)
+    _trace_queries(engine)
+    return engine
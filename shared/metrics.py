@@ -0,0 +1,132 @@
+"""
+HTTP-метрики Prometheus для всех сервисов: одна ASGI-middleware вместо счётчиков
+в каждом обработчике.
+
+Метка route - шаблон пути маршрута (`/users/{user_id}`), а не сам путь, поэтому
+число серий не растёт с числом пользователей и задач. Gateway подставляет префикс
+upstream-маршрута через `request.state.metrics_route`.
+
+Несколько воркеров uvicorn: задайте PROMETHEUS_MULTIPROC_DIR (пустой каталог,
+очищаемый при старте) - каждый процесс пишет метрики в свои файлы, а /metrics
+собирает их со всех воркеров. Метрики с set_function (пулы Redis и БД) в этом
+режиме не экспортируются.
+"""
+
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.responses import Response
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status",
+    ["service", "method", "route", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency until the last body chunk is sent",
+    ["service", "method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "HTTP response body size",
+    ["service", "method", "route"],
+    buckets=SIZE_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being processed",
+    ["service", "method"],
+    multiprocess_mode="livesum",
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def route_template(scope: Scope) -> str:
+    """Шаблон маршрута, которым обработан запрос; для ненайденных - `unmatched`."""
+    override = scope.get("state", {}).get("metrics_route")
+    if override:
+        return override
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Маршруты Starlette (docs, openapi.json) не кладут route в scope
+    app = scope.get("app")
+    if "endpoint" in scope and app is not None:
+        for candidate in getattr(app, "routes", []):
+            match, _ = candidate.matches(scope)
+            if match == Match.FULL:
+                return getattr(candidate, "path", UNMATCHED_ROUTE)
+    return UNMATCHED_ROUTE
+
+
+class PrometheusMiddleware:
+    """
+    ASGI-middleware: задержка, статус, размер ответа и число запросов в работе.
+
+    `app.add_middleware(PrometheusMiddleware, service="task_service")`.
+    Пути из `exclude` (по умолчанию /metrics) не учитываются.
+    """
+
+    def __init__(self, app: ASGIApp, service: str, exclude: tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.service = service
+        self.exclude = set(exclude)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        in_flight = HTTP_IN_FLIGHT.labels(service=self.service, method=method)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            in_flight.dec()
+            route = route_template(scope)
+            HTTP_REQUESTS.labels(
+                service=self.service, method=method, route=route, status=str(status_code)
+            ).inc()
+            HTTP_REQUEST_DURATION.labels(service=self.service, method=method, route=route).observe(duration)
+            HTTP_RESPONSE_SIZE.labels(service=self.service, method=method, route=route).observe(size)
+
+
+def metrics_response() -> Response:
+    """Ответ для /metrics; в multiprocess-режиме - сумма по всем воркерам."""
+    registry = REGISTRY
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,188 @@
+"""
+Ограничение частоты запросов по алгоритму GCRA в Redis.
+
+Состояние ключа - одно число, TAT (theoretical arrival time). Проверка и
+обновление выполняются одним Lua-скриптом, время берётся из Redis (TIME),
+поэтому лимит точный для любого числа реплик и стоит один вызов Redis на запрос.
+
+Локальная предпроверка: после отказа реплика запоминает, до какого момента ключ
+заблокирован, и до этого момента отвечает 429 без обращения к Redis. Это не
+ослабляет лимит - TAT только растёт, и раньше этого момента запрос не пройдёт
+ни на одной реплике.
+"""
+
+import ipaddress
+import math
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+
+import redis.asyncio as redis
+from fastapi import HTTPException, Request, Response, status
+from prometheus_client import Counter
+
+from shared.lru import TTLCache
+
+RATE_LIMIT_REQUESTS = Counter(
+    "rate_limit_requests_total",
+    "Rate limit checks by route and result (allowed, limited, local_limited, error)",
+    ["scope", "result"],
+)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# KEYS[1] - ключ; ARGV[1] - интервал между запросами (мс); ARGV[2] - окно (мс).
+# Возвращает {разрешено (0/1), через сколько мс повторить, сколько запросов осталось}.
+GCRA_SCRIPT = """
+local emission = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local now_parts = redis.call("TIME")
+local now = now_parts[1] * 1000 + math.floor(now_parts[2] / 1000)
+local tat = tonumber(redis.call("GET", KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local new_tat = tat + emission
+local allow_at = new_tat - period
+if now < allow_at then
+    return {0, allow_at - now, 0}
+end
+redis.call("SET", KEYS[1], new_tat, "PX", math.ceil(new_tat - now))
+return {1, 0, math.floor((now - allow_at) / emission)}
+"""
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    """'10/minute' -> (10, 60)."""
+    count, _, period = rate.partition("/")
+    return int(count), PERIODS[period.strip().rstrip("s")]
+
+
+class ClientIP:
+    """
+    IP клиента для ключа лимита.
+
+    X-Forwarded-For выставляет сам клиент, поэтому он учитывается, только если
+    соединение пришло от доверенного прокси (`trusted_proxies` - список CIDR).
+    Адреса заголовка просматриваются справа налево, берётся первый не из
+    доверенных сетей - его дописал последний доверенный прокси, а не клиент.
+    Без доверенных прокси - адрес соединения.
+    """
+
+    def __init__(self, trusted_proxies: Iterable[str] = ()):
+        self.networks = [ipaddress.ip_network(cidr, strict=False) for cidr in trusted_proxies]
+
+    def trusted(self, address: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in network for network in self.networks)
+
+    def __call__(self, request: Request) -> str:
+        peer = request.client.host if request.client else "unknown"
+        if not self.trusted(peer):
+            return peer
+        hops = [
+            hop.strip() for value in request.headers.getlist("x-forwarded-for") for hop in value.split(",")
+        ]
+        hops = [hop for hop in hops if hop]
+        for hop in reversed(hops):
+            if not self.trusted(hop):
+                return hop
+        return hops[0] if hops else peer
+
+
+client_ip = ClientIP()
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    retry_after: float
+    remaining: int
+    # Отказ из локального кэша, без обращения к Redis
+    local: bool = False
+
+
+class RateLimiter:
+    """
+    Проверка лимитов в Redis с локальным кэшем заблокированных ключей.
+
+    `get_client` возвращает текущий клиент Redis или None; пока Redis недоступен,
+    запросы пропускаются (fail open) - лимит не должен останавливать сервис.
+    `key_func` - ключ клиента по умолчанию для всех RateLimit этого лимитера.
+    """
+
+    def __init__(
+        self,
+        get_client: Callable[[], redis.Redis | None],
+        prefix: str,
+        local_size: int = 10000,
+        key_func: Callable[[Request], str] = client_ip,
+    ):
+        self.get_client = get_client
+        self.prefix = prefix
+        self.key_func = key_func
+        self.blocked = TTLCache(maxsize=local_size, ttl=60)
+        self.script = None
+
+    async def hit(self, key: str, limit: int, period: int) -> RateLimitResult:
+        blocked_until = self.blocked.get(key)
+        if blocked_until is not None:
+            return RateLimitResult(
+                allowed=False, retry_after=blocked_until - time.monotonic(), remaining=0, local=True
+            )
+
+        client = self.get_client()
+        if client is None:
+            raise redis.ConnectionError("Redis is unavailable")
+        if self.script is None:
+            self.script = client.register_script(GCRA_SCRIPT)
+        emission = period * 1000 / limit
+        allowed, retry_after_ms, remaining = await self.script(
+            keys=[f"{self.prefix}:{key}"], args=[emission, period * 1000], client=client
+        )
+        if not allowed:
+            retry_after = int(retry_after_ms) / 1000
+            self.blocked.set(key, time.monotonic() + retry_after, ttl=retry_after)
+            return RateLimitResult(allowed=False, retry_after=retry_after, remaining=0)
+        return RateLimitResult(allowed=True, retry_after=0.0, remaining=int(remaining))
+
+
+class RateLimit:
+    """
+    FastAPI-зависимость: `dependencies=[Depends(RateLimit(limiter, "10/minute"))]`.
+
+    Лимит считается отдельно для каждого маршрута и клиента (`key_func`, по
+    умолчанию - ключ лимитера). При превышении - 429 с Retry-After.
+    """
+
+    def __init__(self, limiter: RateLimiter, rate: str, key_func: Callable[[Request], str] | None = None):
+        self.limiter = limiter
+        self.rate = rate
+        self.limit, self.period = parse_rate(rate)
+        self.key_func = key_func or limiter.key_func
+
+    async def __call__(self, request: Request, response: Response):
+        route = request.scope.get("route")
+        scope = f"{request.method}:{route.path if route else request.url.path}"
+        key = f"{scope}:{self.rate}:{self.key_func(request)}"
+        try:
+            result = await self.limiter.hit(key, self.limit, self.period)
+        except redis.RedisError as e:
+            print(f"Лимит запросов не проверен, Redis недоступен: {e}")
+            RATE_LIMIT_REQUESTS.labels(scope=scope, result="error").inc()
+            return
+
+        if not result.allowed:
+            outcome = "local_limited" if result.local else "limited"
+            RATE_LIMIT_REQUESTS.labels(scope=scope, result=outcome).inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Rate limit exceeded: {self.rate}",
+                headers={"Retry-After": str(max(1, math.ceil(result.retry_after)))},
+            )
+        RATE_LIMIT_REQUESTS.labels(scope=scope, result="allowed").inc()
+        response.headers["X-RateLimit-Limit"] = str(self.limit)
+        response.headers["X-RateLimit-Remaining"] = str(result.remaining)
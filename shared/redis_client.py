@@ -0,0 +1,133 @@
+# pylint:disable=abstract-method,too-many-ancestors
+import asyncio
+
+import redis.asyncio as redis
+from prometheus_client import Gauge
+from pydantic_settings import BaseSettings
+from redis.asyncio.client import Pipeline
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+from redis.utils import HIREDIS_AVAILABLE
+
+from shared.tracing import tracer
+
+REDIS_UP = Gauge("redis_up", "1 if the last Redis health check succeeded")
+REDIS_POOL_MAX = Gauge("redis_pool_max_connections", "Redis connection pool size")
+REDIS_POOL_IN_USE = Gauge("redis_pool_in_use_connections", "Redis connections checked out of the pool")
+REDIS_POOL_IDLE = Gauge("redis_pool_idle_connections", "Open Redis connections waiting in the pool")
+
+
+class RedisSettings(BaseSettings):
+    """Настройки Redis, общие для сервисов: Settings сервиса наследуется от них."""
+
+    REDIS_HOST: str = "localhost"
+    REDIS_PORT: int = 6379
+    REDIS_DB: int = 0
+    # Пул соединений: размер, ожидание свободного соединения и таймауты сокета, секунды
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 2.0
+    REDIS_SOCKET_TIMEOUT: float = 1.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 1.0
+    # Период проверки соединения и предельная задержка переподключения, секунды
+    REDIS_HEALTH_CHECK_INTERVAL: int = 15
+    REDIS_RECONNECT_MAX_DELAY: float = 30.0
+
+
+class TracedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        with tracer.span(
+            "redis pipeline", kind="client", child_only=True, **{"db.redis.commands": len(self.command_stack)}
+        ):
+            return await super().execute(raise_on_error)
+
+
+class TracedRedis(redis.Redis):
+    """Клиент Redis со спаном на каждую команду и пайплайн внутри идущей трассы."""
+
+    async def execute_command(self, *args, **options):
+        with tracer.span(f"redis {args[0]}", kind="client", child_only=True):
+            return await super().execute_command(*args, **options)
+
+    def pipeline(self, transaction: bool = True, shard_hint: str | None = None) -> TracedPipeline:
+        return TracedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+class RedisClient:
+    """
+    Клиент Redis с явно настроенным пулом соединений по RedisSettings.
+
+    Пул блокирующий: при исчерпании соединений запрос ждёт до REDIS_POOL_TIMEOUT,
+    а не открывает новое соединение. `monitor` из lifespan периодически пингует
+    Redis; пока Redis недоступен, `client` равен None и кэши сразу идут мимо Redis,
+    не пытаясь подключиться на каждом запросе. Переподключение - с экспоненциальной
+    задержкой. `connection` доступен всегда, независимо от состояния Redis.
+    """
+
+    def __init__(self, settings: RedisSettings):
+        self.settings = settings
+        self.connection: redis.Redis | None = None
+        self.client: redis.Redis | None = None
+
+    async def connect(self):
+        settings = self.settings
+        if self.connection is None:
+            pool = redis.BlockingConnectionPool(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.REDIS_DB,
+                decode_responses=True,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                timeout=settings.REDIS_POOL_TIMEOUT,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+                socket_keepalive=True,
+                health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+                retry=Retry(ExponentialBackoff(cap=1.0, base=0.05), retries=2),
+            )
+            self.connection = TracedRedis(connection_pool=pool)
+            self._export_pool_metrics(pool)
+            print(f"Redis: пул на {pool.max_connections} соединений, hiredis: {HIREDIS_AVAILABLE}")
+        if not await self.check():
+            print("Redis недоступен, кэши работают без него до восстановления соединения")
+
+    async def check(self) -> bool:
+        try:
+            await self.connection.ping()
+        except redis.RedisError as e:
+            if self.client is not None:
+                print(f"Не удалось подключиться к Redis: {e}")
+            self.client = None
+            REDIS_UP.set(0)
+            return False
+        if self.client is None:
+            print("Успешное подключение")
+        self.client = self.connection
+        REDIS_UP.set(1)
+        return True
+
+    async def monitor(self):
+        """Фоновая проверка доступности Redis; после сбоя - повтор с растущей задержкой."""
+        settings = self.settings
+        delay = settings.REDIS_HEALTH_CHECK_INTERVAL
+        backoff = 0.5
+        while True:
+            await asyncio.sleep(delay)
+            if await self.check():
+                delay = settings.REDIS_HEALTH_CHECK_INTERVAL
+                backoff = 0.5
+            else:
+                backoff = min(backoff * 2, settings.REDIS_RECONNECT_MAX_DELAY)
+                delay = backoff
+
+    @staticmethod
+    def _export_pool_metrics(pool: redis.ConnectionPool):
+        # Значения считаются в момент сбора метрик из внутреннего состояния пула
+        REDIS_POOL_MAX.set(pool.max_connections)
+        REDIS_POOL_IN_USE.set_function(lambda: len(pool._in_use_connections))  # pylint:disable=protected-access
+        REDIS_POOL_IDLE.set_function(lambda: len(pool._available_connections))  # pylint:disable=protected-access
+
+    async def close(self):
+        if self.connection:
+            await self.connection.aclose()
+            self.connection = None
+            self.client = None
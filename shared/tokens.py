@@ -0,0 +1,95 @@
+import time
+
+import httpx
+import jwt
+
+
+class JWKSKeySet:
+    """
+    Публичные ключи auth_service, загруженные с JWKS-эндпоинта.
+
+    Ключи разбираются один раз при загрузке. Неизвестный `kid` (ротация ключа)
+    вызывает повторную загрузку, но не чаще раза в `min_refresh_interval` секунд.
+    """
+
+    def __init__(self, url: str, min_refresh_interval: float = 30.0):
+        self.url = url
+        self.min_refresh_interval = min_refresh_interval
+        self.keys: dict[str, jwt.PyJWK] = {}
+        self._last_refresh = 0.0
+
+    async def refresh(self):
+        self._last_refresh = time.monotonic()
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            response = await client.get(self.url)
+            response.raise_for_status()
+        jwk_set = jwt.PyJWKSet.from_dict(response.json())
+        self.keys = {key.key_id: key for key in jwk_set.keys}
+
+    async def get(self, kid: str | None) -> jwt.PyJWK | None:
+        if kid is None:
+            return None
+        if kid in self.keys:
+            return self.keys[kid]
+        if time.monotonic() - self._last_refresh < self.min_refresh_interval:
+            return None
+        try:
+            await self.refresh()
+        except (httpx.HTTPError, jwt.PyJWTError) as e:
+            print(f"Не удалось обновить JWKS: {e}")
+        return self.keys.get(kid)
+
+
+class AccessTokenVerifier:
+    """
+    Локальная проверка access токена auth_service: подпись, срок действия, тип
+    и claim `id`. Ключ - общий секрет/публичный ключ либо JWKS.
+
+    С JWKS токены без `kid` (подписанные legacy-ключом SECRET_KEY/ALGORITHM)
+    проверяются `key`; если он не задан, такие токены отклоняются и
+    пользователям придётся войти заново.
+    """
+
+    def __init__(self, key: str | None = None, algorithm: str = "HS256", jwks: JWKSKeySet | None = None):
+        if key is None and jwks is None:
+            raise ValueError("AccessTokenVerifier needs a key or a JWKS key set")
+        self.key = key
+        self.algorithm = algorithm
+        self.jwks = jwks
+
+    async def connect(self):
+        if not self.jwks:
+            return
+        # auth_service может стартовать позже: ключи догрузятся при первом неизвестном kid
+        try:
+            await self.jwks.refresh()
+        except (httpx.HTTPError, jwt.PyJWTError) as e:
+            print(f"Не удалось загрузить JWKS при старте: {e}")
+
+    @staticmethod
+    def decode(token: str, key, algorithm: str) -> int | None:
+        """Возвращает id пользователя из токена или None, если токен невалиден."""
+        try:
+            payload = jwt.decode(token, key, algorithms=[algorithm], options={"require": ["exp"]})
+        except jwt.PyJWTError:
+            return None
+        if payload.get("type", "access") != "access":
+            return None
+        user_id = payload.get("id")
+        if not isinstance(user_id, int) or isinstance(user_id, bool):
+            return None
+        return user_id
+
+    async def verify(self, token: str) -> int | None:
+        if not self.jwks:
+            return self.decode(token, self.key, self.algorithm)
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+        except jwt.PyJWTError:
+            return None
+        if kid is None:
+            return self.decode(token, self.key, self.algorithm) if self.key else None
+        jwk = await self.jwks.get(kid)
+        if jwk is None:
+            return None
+        return self.decode(token, jwk.key, jwk.algorithm_name)
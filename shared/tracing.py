@@ -0,0 +1,369 @@
+# pylint:disable=too-many-instance-attributes
+"""
+Распределённая трассировка в формате W3C Trace Context без внешних зависимостей.
+
+Контекст (trace_id, span_id, флаг сэмплирования) передаётся заголовком
+`traceparent` в HTTP-запросах и в headers сообщений RabbitMQ. Спаны пишутся
+фоновым потоком в JSONL-файл либо в OTLP/HTTP collector (JSON-кодировка OTLP),
+откуда их читают Jaeger/Tempo.
+
+Настройка через переменные окружения:
+    TRACING_EXPORTER      none (по умолчанию), file или otlp
+    TRACING_FILE          путь к JSONL-файлу, по умолчанию traces.jsonl
+    TRACING_OTLP_ENDPOINT по умолчанию http://localhost:4318/v1/traces
+    TRACING_SAMPLE_RATIO  доля сэмплируемых трасс, по умолчанию 1.0
+
+Решение о сэмплировании принимает первый сервис трассы, остальные следуют флагу
+из traceparent. Спаны БД, Redis и хеширования паролей создаются только внутри
+уже идущей трассы - фоновые задачи (health-check Redis) трасс не порождают.
+"""
+
+import json
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+from prometheus_client import Counter
+
+from shared.metrics import route_template
+
+TRACEPARENT = "traceparent"
+TRACE_HEADERS = (TRACEPARENT, "tracestate")
+SPAN_KINDS = {"internal": 1, "server": 2, "client": 3, "producer": 4, "consumer": 5}
+
+TRACING_SPANS_DROPPED = Counter("tracing_spans_dropped_total", "Spans dropped on a full export queue")
+TRACING_EXPORT_ERRORS = Counter("tracing_export_errors_total", "Failed span export batches")
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+def parse_traceparent(value: str | bytes | None) -> SpanContext | None:
+    """Разбирает `00-<trace_id>-<span_id>-<flags>`; некорректное значение - None."""
+    if isinstance(value, bytes):
+        value = value.decode("latin-1")
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16)
+        int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return SpanContext(trace_id=parts[1], span_id=parts[2], sampled=bool(flags & 1))
+
+
+@dataclass
+class Span:
+    name: str
+    context: SpanContext
+    parent_id: str | None
+    kind: str = "internal"
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException | str):
+        self.error = error if isinstance(error, str) else f"{type(error).__name__}: {error}"
+
+    def to_dict(self, service: str) -> dict:
+        return {
+            "service": service,
+            "name": self.name,
+            "kind": self.kind,
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.context.trace_id,
+            "spanId": self.context.span_id,
+            "name": self.name,
+            "kind": SPAN_KINDS[self.kind],
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": otlp_value(value)} for key, value in self.attributes.items()
+            ],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 0},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def otlp_value(value: Any) -> dict:
+    """Значение атрибута в JSON-кодировке OTLP."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class NoopSpan:
+    """Заглушка, когда трассировка выключена: код не проверяет span на None."""
+
+    name = ""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def record_error(self, error: BaseException | str):
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+_current: ContextVar[SpanContext | None] = ContextVar("current_span", default=None)
+
+
+class SpanExporter:
+    """
+    Отправляет спаны пачками из фонового потока, не задерживая обработку запросов.
+    При переполнении очереди спаны отбрасываются (tracing_spans_dropped_total).
+    """
+
+    def __init__(
+        self,
+        service: str,
+        *,
+        file_path: str | None = None,
+        otlp_endpoint: str | None = None,
+        max_queue: int = 10000,
+        batch_size: int = 512,
+        interval: float = 1.0,
+    ):
+        self.service = service
+        self.file_path = file_path
+        self.otlp_endpoint = otlp_endpoint
+        self.batch_size = batch_size
+        self.interval = interval
+        self.queue: queue.Queue[Span] = queue.Queue(maxsize=max_queue)
+        self.http = httpx.Client(timeout=5.0) if otlp_endpoint else None
+        threading.Thread(target=self._run, name="span-exporter", daemon=True).start()
+
+    def export(self, span: Span):
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            TRACING_SPANS_DROPPED.inc()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except (OSError, httpx.HTTPError) as e:
+                TRACING_EXPORT_ERRORS.inc()
+                print(f"Не удалось выгрузить {len(batch)} спанов: {e}")
+
+    def _write(self, batch: list[Span]):
+        if self.file_path:
+            with open(self.file_path, "a", encoding="utf-8") as file:
+                for span in batch:
+                    file.write(json.dumps(span.to_dict(self.service), ensure_ascii=False) + "\n")
+        if self.http:
+            payload = {
+                "resourceSpans": [
+                    {
+                        "resource": {
+                            "attributes": [{"key": "service.name", "value": {"stringValue": self.service}}]
+                        },
+                        "scopeSpans": [
+                            {"scope": {"name": "shared.tracing"}, "spans": [span.to_otlp() for span in batch]}
+                        ],
+                    }
+                ]
+            }
+            self.http.post(self.otlp_endpoint, json=payload).raise_for_status()
+
+
+class Tracer:
+    """Создаёт спаны и хранит текущий контекст трассы в contextvars."""
+
+    def __init__(self):
+        self.service = "unknown"
+        self.exporter: SpanExporter | None = None
+        self.sample_ratio = 1.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def configure(self, service: str, exporter: SpanExporter | None, sample_ratio: float = 1.0):
+        self.service = service
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+
+    def start_span(
+        self,
+        name: str,
+        *,
+        kind: str = "internal",
+        parent: SpanContext | None = None,
+        child_only: bool = False,
+        start_ns: int | None = None,
+        attributes: dict[str, Any] | None = None,
+    ) -> Span | None:
+        """
+        Новый спан, дочерний к `parent` или к текущему. child_only - не начинать
+        новую трассу, если текущей нет. Спан не становится текущим, см. `span`.
+        """
+        if self.exporter is None:
+            return None
+        parent = parent or _current.get()
+        if parent is None:
+            if child_only:
+                return None
+            trace_id, sampled = secrets.token_hex(16), random.random() < self.sample_ratio
+        else:
+            trace_id, sampled = parent.trace_id, parent.sampled
+        return Span(
+            name=name,
+            context=SpanContext(trace_id=trace_id, span_id=secrets.token_hex(8), sampled=sampled),
+            parent_id=parent.span_id if parent else None,
+            kind=kind,
+            start_ns=start_ns or time.time_ns(),
+            attributes=attributes or {},
+        )
+
+    def end_span(self, span: Span | None, end_ns: int | None = None):
+        if span is None or self.exporter is None:
+            return
+        span.end_ns = end_ns or time.time_ns()
+        if span.context.sampled:
+            self.exporter.export(span)
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        *,
+        kind: str = "internal",
+        parent: SpanContext | None = None,
+        child_only: bool = False,
+        **attributes: Any,
+    ) -> Iterator[Span | NoopSpan]:
+        """Спан на время блока `with`; внутри блока он текущий."""
+        span = self.start_span(name, kind=kind, parent=parent, child_only=child_only, attributes=attributes)
+        if span is None:
+            yield NOOP_SPAN
+            return
+        token = _current.set(span.context)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current.reset(token)
+            self.end_span(span)
+
+    @staticmethod
+    def headers() -> list[tuple[str, str]]:
+        """Заголовки для передачи текущего контекста в следующий сервис."""
+        context = _current.get()
+        return [(TRACEPARENT, context.traceparent())] if context else []
+
+
+tracer = Tracer()
+
+
+def setup_tracing(service: str):
+    """Настраивает глобальный `tracer` по переменным окружения TRACING_*."""
+    exporter_type = os.getenv("TRACING_EXPORTER", "none").lower()
+    if exporter_type not in {"file", "otlp"}:
+        tracer.configure(service, exporter=None)
+        return
+    exporter = SpanExporter(
+        service,
+        file_path=os.getenv("TRACING_FILE", "traces.jsonl") if exporter_type == "file" else None,
+        otlp_endpoint=(
+            os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+            if exporter_type == "otlp"
+            else None
+        ),
+    )
+    tracer.configure(service, exporter, sample_ratio=float(os.getenv("TRACING_SAMPLE_RATIO", "1.0")))
+    print(f"Трассировка: {service} -> {exporter_type}")
+
+
+class TracingMiddleware:
+    """
+    ASGI-middleware: серверный спан на каждый HTTP-запрос, родитель - traceparent
+    из заголовков запроса. Имя спана - метод и шаблон маршрута.
+    """
+
+    def __init__(self, app, exclude: tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.exclude = set(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        parent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                parent = parse_traceparent(value)
+                break
+
+        method = scope["method"]
+        with tracer.span(method, kind="server", parent=parent, **{"http.method": method}) as span:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.record_error(f"HTTP {message['status']}")
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                span.name = f"{method} {route_template(scope)}"
+                span.set_attribute("http.target", scope["path"])
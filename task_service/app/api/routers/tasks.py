@@ -1,16 +1,24 @@
 # pylint:disable=unused-argument
 from typing import Annotated
 
-import redis.asyncio as redis
-from fastapi import APIRouter, Depends, Path, status
-from fastapi_limiter.depends import RateLimiter
+from fastapi import APIRouter, Depends, Path, Query, Response, status
 
+from shared.rate_limit import RateLimit
 from task_service.app.core.dependencies import (
     get_current_user,
-    get_redis_client,
     get_task_service,
 )
-from task_service.app.schemas.tasks import Task, TaskCreate
+from task_service.app.core.limiter import limiter
+from task_service.app.schemas.tasks import (
+    Task,
+    TaskBulkCreate,
+    TaskBulkDelete,
+    TaskBulkResponse,
+    TaskBulkUpdate,
+    TaskCreate,
+    TaskListParams,
+    TaskPage,
+)
 from task_service.app.services.tasks import TaskService
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
@@ -18,51 +26,108 @@ router = APIRouter(prefix="/tasks", tags=["tasks"])
 
 @router.get(
     "",
-    response_model=list[Task],
-    dependencies=[Depends(RateLimiter(times=15, minutes=1))],
+    response_class=Response,
+    responses={
+        status.HTTP_200_OK: {
+            "model": TaskPage,
+            "description": "Страница задач; с fields или view у задач только выбранные поля",
+        }
+    },
+    dependencies=[Depends(RateLimit(limiter, "15/minute"))],
     status_code=status.HTTP_200_OK,
 )
 async def get_tasks(
     task_service: Annotated[TaskService, Depends(get_task_service)],
     user_id: Annotated[int, Depends(get_current_user)],
-) -> list[Task]:
-    return await task_service.get_tasks(user_id=user_id)
+    params: Annotated[TaskListParams, Query()],
+    response: Response,
+) -> Response:
+    # Страница уже сериализована (и, возможно, взята из кэша) - отдаётся без повторной валидации,
+    # поэтому маршрут объявлен с response_class=Response, а TaskPage - только схема для документации
+    page = await task_service.list_tasks_json(user_id=user_id, params=params)
+    # Заголовки зависимостей (X-RateLimit-*) выставлены на response, а возвращается другой объект
+    headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+    return Response(content=page, media_type="application/json", headers=headers)
+
+
+# /bulk объявлены до /{task_id}, иначе DELETE /tasks/bulk попадёт в delete_task
+@router.post(
+    "/bulk",
+    response_model=TaskBulkResponse,
+    dependencies=[Depends(RateLimit(limiter, "5/minute"))],
+    status_code=status.HTTP_200_OK,
+)
+async def bulk_create_tasks(
+    task_service: Annotated[TaskService, Depends(get_task_service)],
+    user_id: Annotated[int, Depends(get_current_user)],
+    payload: TaskBulkCreate,
+) -> TaskBulkResponse:
+    return TaskBulkResponse(results=await task_service.bulk_create(items=payload.items, user_id=user_id))
+
+
+@router.patch(
+    "/bulk",
+    response_model=TaskBulkResponse,
+    dependencies=[Depends(RateLimit(limiter, "5/minute"))],
+    status_code=status.HTTP_200_OK,
+)
+async def bulk_update_tasks(
+    task_service: Annotated[TaskService, Depends(get_task_service)],
+    user_id: Annotated[int, Depends(get_current_user)],
+    payload: TaskBulkUpdate,
+) -> TaskBulkResponse:
+    return TaskBulkResponse(results=await task_service.bulk_update(items=payload.items, user_id=user_id))
+
+
+@router.delete(
+    "/bulk",
+    response_model=TaskBulkResponse,
+    dependencies=[Depends(RateLimit(limiter, "5/minute"))],
+    status_code=status.HTTP_200_OK,
+)
+async def bulk_delete_tasks(
+    task_service: Annotated[TaskService, Depends(get_task_service)],
+    user_id: Annotated[int, Depends(get_current_user)],
+    payload: TaskBulkDelete,
+) -> TaskBulkResponse:
+    return TaskBulkResponse(results=await task_service.bulk_delete(ids=payload.ids, user_id=user_id))
 
 
 @router.get(
     "/{task_id}",
     response_model=Task,
-    dependencies=[Depends(RateLimiter(times=10, minutes=1))],
+    dependencies=[Depends(RateLimit(limiter, "10/minute"))],
     status_code=status.HTTP_200_OK,
 )
 async def get_task(
     task_id: Annotated[int, Path(ge=1)],
     task_service: Annotated[TaskService, Depends(get_task_service)],
     user_id: Annotated[int, Depends(get_current_user)],
-    redis_client: Annotated[redis.Redis, Depends(get_redis_client)],
+    response: Response,
 ) -> Task | None:
-    return await task_service.get_task_by_id(task_id=task_id, user_id=user_id, r=redis_client)
+    # Изменения через gateway сбрасывают его кэш сразу, остальные видны не позже чем через max-age
+    response.headers["Cache-Control"] = "private, max-age=5"
+    return await task_service.get_task_by_id(task_id=task_id, user_id=user_id)
 
 
 @router.post(
     "",
     response_model=Task,
-    dependencies=[Depends(RateLimiter(times=5, minutes=1))],
+    dependencies=[Depends(RateLimit(limiter, "5/minute"))],
     status_code=status.HTTP_201_CREATED,
 )
 async def create_task(
     task_service: Annotated[TaskService, Depends(get_task_service)],
     user_id: Annotated[int, Depends(get_current_user)],
     task_create: TaskCreate,
-    redis_client: Annotated[redis.Redis, Depends(get_redis_client)],
 ) -> Task | None:
-    return await task_service.create_task(task_create=task_create, user_id=user_id, r=redis_client)
+    return await task_service.create_task(task_create=task_create, user_id=user_id)
 
 
 @router.put(
     "/{task_id}",
     response_model=Task,
-    dependencies=[Depends(RateLimiter(times=5, minutes=1))],
+    dependencies=[Depends(RateLimit(limiter, "5/minute"))],
     status_code=status.HTTP_200_OK,
 )
 async def update_task(
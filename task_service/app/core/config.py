@@ -1,17 +1,74 @@
 from functools import lru_cache
+from typing import Literal
 
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic_settings import SettingsConfigDict
 
+from shared.database import DatabaseSettings
+from shared.redis_client import RedisSettings
 
-class Settings(BaseSettings):
+
+class Settings(DatabaseSettings, RedisSettings):
     POSTGRES_TASK_DB_URL: str
     POSTGRES_TASK_USER: str
     POSTGRES_TASK_PASSWORD: str
     POSTGRES_TASK_DB: str
+    # Сети прокси (CIDR), от которых принимается X-Forwarded-For для лимитов запросов,
+    # например ["172.16.0.0/12"] для gateway в сети docker; пусто - лимит по адресу соединения
+    TRUSTED_PROXIES: list[str] = []
     RABBITMQ_URL: str
     RABBITMQ_DEFAULT_USER: str
     RABBITMQ_DEFAULT_PASS: str
 
+    # rpc - каждый токен проверяется в auth_service через RabbitMQ;
+    # local - подпись и срок действия проверяются на месте, без RPC;
+    # hybrid - локальная проверка + RPC для проверки отзыва (удалённый пользователь).
+    TOKEN_VALIDATION_MODE: Literal["rpc", "local", "hybrid"] = "rpc"
+    SECRET_KEY: str | None = None
+    ALGORITHM: str = "HS256"
+    JWT_PUBLIC_KEY: str | None = None
+    # Например http://auth_service:8000/users/.well-known/jwks.json
+    JWKS_URL: str | None = None
+
+    # Доверять заголовкам X-User-* от gateway, подписанным GATEWAY_IDENTITY_SECRET
+    TRUST_GATEWAY_IDENTITY: bool = False
+    GATEWAY_IDENTITY_SECRET: str | None = None
+    GATEWAY_IDENTITY_MAX_AGE: int = 60
+
+    # Размер страницы GET /tasks по умолчанию и верхняя граница параметра limit
+    TASKS_PAGE_DEFAULT_LIMIT: int = 50
+    TASKS_PAGE_MAX_LIMIT: int = 100
+    # Максимум элементов в одном запросе /tasks/bulk
+    TASKS_BULK_MAX_ITEMS: int = 500
+
+    # TTL кэша задач и страниц списка в Redis, секунды
+    TASK_CACHE_TTL: int = 60
+    TASK_LIST_CACHE_TTL: int = 30
+    # TTL записи "задачи нет", чтобы запросы несуществующих id не шли в БД
+    TASK_NEGATIVE_CACHE_TTL: int = 5
+    # Блокировка на загрузку задачи из БД и сколько другие реплики ждут её результата
+    TASK_CACHE_LOCK_TTL: float = 5.0
+    TASK_CACHE_LOCK_WAIT: float = 1.0
+    # XFetch: чем больше, тем раньше до истечения TTL запись обновляется заранее
+    TASK_CACHE_EARLY_REFRESH_BETA: float = 1.0
+    # L1-кэш задач в памяти процесса перед Redis; согласованность - через Redis pub/sub
+    TASK_L1_CACHE_ENABLED: bool = False
+    TASK_L1_CACHE_TTL: float = 5.0
+    TASK_L1_CACHE_MAX_SIZE: int = 10000
+
+    # Таймаут RPC к auth_service: p99 задержки последних RPC_LATENCY_WINDOW ответов,
+    # умноженный на RPC_TIMEOUT_MULTIPLIER, в пределах [RPC_TIMEOUT_MIN, RPC_TIMEOUT_MAX] секунд
+    RPC_TIMEOUT_MIN: float = 0.5
+    RPC_TIMEOUT_MAX: float = 5.0
+    RPC_TIMEOUT_MULTIPLIER: float = 3.0
+    RPC_LATENCY_WINDOW: int = 1000
+    # После стольких таймаутов подряд RPC отклоняются сразу (503) на RPC_BREAKER_OPEN_SECONDS секунд
+    RPC_BREAKER_FAILURE_THRESHOLD: int = 5
+    RPC_BREAKER_OPEN_SECONDS: float = 10.0
+
+    TOKEN_CACHE_ENABLED: bool = True
+    TOKEN_CACHE_TTL: int = 300
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+
     model_config = SettingsConfigDict(env_file="../.env", env_file_encoding="utf-8", extra="ignore")
 
 
@@ -1,11 +1,12 @@
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 
+from shared.database import create_engine
 from task_service.app.core.config import settings
 
 DATABASE_URL = settings.POSTGRES_TASK_DB_URL
 
-async_engine = create_async_engine(DATABASE_URL, echo=True)
+async_engine = create_engine(DATABASE_URL, settings, service="task_service")
 async_session_maker = async_sessionmaker(bind=async_engine, expire_on_commit=False, class_=AsyncSession)
 
 
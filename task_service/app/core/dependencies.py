@@ -1,19 +1,21 @@
 from collections.abc import AsyncGenerator
 
-from fastapi import Depends, HTTPException
+import redis.asyncio as redis
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from shared.identity import verify_identity
+from task_service.app.core.config import settings
 from task_service.app.core.database import async_session_maker
-from task_service.app.core.rabbitmq import (
-    RabbitMQTokenValidator,
-    user_validator_instance,
-)
-from task_service.app.core.redis_client import redis, redis_client
+from task_service.app.core.jwt_validator import LocalTokenValidator, token_validator_instance
+from task_service.app.core.rabbitmq import RabbitMQTokenValidator
+from task_service.app.core.redis_client import redis_client
 from task_service.app.repositories.tasks import TaskRepository
+from task_service.app.services.cache import task_cache
 from task_service.app.services.tasks import TaskService
 
-security = HTTPBearer()
+security = HTTPBearer(auto_error=False)
 
 
 async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
@@ -28,26 +30,40 @@ def get_task_repository(db: AsyncSession = Depends(get_async_db)) -> TaskReposit
     return TaskRepository(db=db)
 
 
-def get_token_validator() -> RabbitMQTokenValidator:
-    return user_validator_instance
+def get_token_validator() -> RabbitMQTokenValidator | LocalTokenValidator:
+    return token_validator_instance
 
 
 async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    rabbitmq_client: RabbitMQTokenValidator = Depends(get_token_validator),
+    request: Request,
+    credentials: HTTPAuthorizationCredentials | None = Depends(security),
+    token_validator: RabbitMQTokenValidator | LocalTokenValidator = Depends(get_token_validator),
 ):
     """Зависимость для получения текущего пользователя"""
-    user_id = await rabbitmq_client.validate_token(credentials.credentials)
+    if settings.TRUST_GATEWAY_IDENTITY and settings.GATEWAY_IDENTITY_SECRET:
+        user_id = verify_identity(
+            settings.GATEWAY_IDENTITY_SECRET,
+            request.headers,
+            method=request.method,
+            path=request.url.path,
+            query=request.url.query,
+            max_age=settings.GATEWAY_IDENTITY_MAX_AGE,
+        )
+        if user_id:
+            return user_id
+
+    if credentials is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    user_id = await token_validator.validate_token(credentials.credentials)
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid token")
     return user_id
 
 
 def get_task_service(task_repo: TaskRepository = Depends(get_task_repository)):
-    return TaskService(task_repository=task_repo)
+    return TaskService(task_repository=task_repo, cache=task_cache)
 
 
-async def get_redis_client() -> redis.Redis:
-    if not redis_client.client:
-        await redis_client.connect()
+def get_redis_client() -> redis.Redis | None:
+    """Клиент Redis или None, пока Redis недоступен; переподключается RedisClient.monitor."""
     return redis_client.client
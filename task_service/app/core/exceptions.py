@@ -0,0 +1,34 @@
+from fastapi import HTTPException, status
+
+
+class AppException(HTTPException):
+    def __init__(self, status_code: int, detail: str, headers: dict | None = None):
+        super().__init__(status_code=status_code, detail=detail, headers=headers)
+
+
+class NotFoundException(AppException):
+    def __init__(
+        self,
+        status_code: int = status.HTTP_404_NOT_FOUND,
+        detail: str = "Resource not found",
+    ):
+        super().__init__(status_code=status_code, detail=detail)
+
+
+class BadRequestException(AppException):
+    def __init__(
+        self,
+        status_code: int = status.HTTP_400_BAD_REQUEST,
+        detail: str = "Bad request",
+    ):
+        super().__init__(status_code=status_code, detail=detail)
+
+
+class ServiceUnavailableException(AppException):
+    def __init__(
+        self,
+        status_code: int = status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail: str = "Service temporarily unavailable",
+        retry_after: int = 1,
+    ):
+        super().__init__(status_code=status_code, detail=detail, headers={"Retry-After": str(retry_after)})
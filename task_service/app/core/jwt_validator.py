@@ -0,0 +1,59 @@
+from shared.tokens import AccessTokenVerifier, JWKSKeySet
+from task_service.app.core.config import settings
+from task_service.app.core.rabbitmq import RabbitMQTokenValidator, user_validator_instance
+
+
+class LocalTokenValidator:
+    """
+    Проверяет access токен на месте: подпись, срок действия и claim `id`,
+    который auth_service кладёт в токен в `create_access_token`.
+
+    Ключ проверки - SECRET_KEY/JWT_PUBLIC_KEY либо публичные ключи из JWKS_URL.
+    Если задан `fallback`, токен с валидной подписью дополнительно подтверждается
+    через RPC - так отлавливаются отозванные токены удалённых пользователей.
+    Невалидные токены отклоняются без обращения к auth_service.
+    """
+
+    def __init__(self, verifier: AccessTokenVerifier, fallback: RabbitMQTokenValidator | None = None):
+        self.verifier = verifier
+        self.fallback = fallback
+
+    async def connect(self):
+        await self.verifier.connect()
+        if self.fallback:
+            await self.fallback.connect()
+
+    async def close(self):
+        if self.fallback:
+            await self.fallback.close()
+
+    async def validate_token(self, token: str) -> int | None:
+        user_id = await self.verifier.verify(token)
+        if user_id is None or self.fallback is None:
+            return user_id
+        return await self.fallback.validate_token(token)
+
+
+def build_token_validator() -> RabbitMQTokenValidator | LocalTokenValidator:
+    """Собирает валидатор токенов согласно TOKEN_VALIDATION_MODE."""
+    if settings.TOKEN_VALIDATION_MODE == "rpc":
+        return user_validator_instance
+
+    fallback = user_validator_instance if settings.TOKEN_VALIDATION_MODE == "hybrid" else None
+    if settings.JWKS_URL:
+        # SECRET_KEY при JWKS нужен только для токенов без kid, выпущенных до перехода на ключи из каталога
+        verifier = AccessTokenVerifier(
+            key=settings.SECRET_KEY, algorithm=settings.ALGORITHM, jwks=JWKSKeySet(settings.JWKS_URL)
+        )
+        return LocalTokenValidator(verifier, fallback=fallback)
+
+    key = settings.JWT_PUBLIC_KEY or settings.SECRET_KEY
+    if not key:
+        raise RuntimeError(
+            f"TOKEN_VALIDATION_MODE={settings.TOKEN_VALIDATION_MODE} "
+            "requires JWKS_URL, JWT_PUBLIC_KEY or SECRET_KEY"
+        )
+    return LocalTokenValidator(AccessTokenVerifier(key=key, algorithm=settings.ALGORITHM), fallback=fallback)
+
+
+token_validator_instance = build_token_validator()
@@ -1,12 +1,9 @@
-from fastapi_limiter import FastAPILimiter
+from shared.rate_limit import ClientIP, RateLimiter
+from task_service.app.core.config import settings
+from task_service.app.core.redis_client import redis_client
 
-from .redis_client import redis_client
-
-
-async def init_limiter():
-    """
-    Инициализация FastAPI Limiter с существующим Redis клиентом
-    """
-    if not redis_client.client:
-        await redis_client.connect()
-    await FastAPILimiter.init(redis_client.client)
+limiter = RateLimiter(
+    lambda: redis_client.client,
+    prefix="rate:task_service",
+    key_func=ClientIP(settings.TRUSTED_PROXIES),
+)
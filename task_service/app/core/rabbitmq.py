@@ -1,74 +1,192 @@
+# pylint:disable=too-many-instance-attributes
 import asyncio
+import json
+import time
 import uuid
+from collections.abc import Awaitable, Callable
 
 import aio_pika
 from aio_pika.abc import AbstractIncomingMessage
+from aio_pika.exceptions import AMQPError, ChannelInvalidStateError
+from prometheus_client import Counter, Gauge, Histogram
 
+from shared.lru import TTLCache
+from shared.metrics import LATENCY_BUCKETS
+from shared.tracing import parse_traceparent, tracer
 from task_service.app.core.config import settings
+from task_service.app.core.exceptions import ServiceUnavailableException
+from task_service.app.core.rpc_policy import AdaptiveTimeout, CircuitBreaker
+from task_service.app.core.token_cache import token_cache
 
 RABBITMQ_URL = settings.RABBITMQ_URL
+USER_EVENTS_EXCHANGE = "user_events"
+# Сколько помнить запросы, не дождавшиеся ответа, чтобы учесть задержку опоздавших ответов, секунды
+LATE_REPLY_TTL = 60.0
+
+RPC_REQUESTS = Counter(
+    "rpc_client_requests_total",
+    "Token check RPCs by result (ok, timeout, rejected, unavailable)",
+    ["result"],
+)
+RPC_DURATION = Histogram(
+    "rpc_client_duration_seconds",
+    "Token check RPC round-trip time of answered calls",
+    buckets=LATENCY_BUCKETS,
+)
+RPC_LATE_REPLIES = Counter("rpc_client_late_replies_total", "Replies that arrived after the call timed out")
+RPC_PENDING = Gauge("rpc_client_pending_requests", "RPCs waiting for a reply")
+RPC_TIMEOUT = Gauge("rpc_client_timeout_seconds", "Current adaptive RPC timeout")
 
 
 class RpcClient:
-    """Асинхронный RPC клиент для RabbitMQ."""
+    """
+    Асинхронный RPC клиент для RabbitMQ.
+
+    Таймаут вызова подстраивается под задержку ответов (AdaptiveTimeout), после
+    серии таймаутов breaker отклоняет вызовы сразу. Недоступность auth_service -
+    ServiceUnavailableException (503), а не None, который превратился бы в 401.
+    """
 
     def __init__(self, amqp_url: str = RABBITMQ_URL):
         self.amqp_url: str = amqp_url
         self.connection: aio_pika.RobustConnection | None = None
         self.channel: aio_pika.Channel | None = None
         self.callback_queue: aio_pika.Queue | None = None
-        self.futures = {}
-        self.loop = asyncio.get_running_loop()
+        self.futures: dict[str, asyncio.Future] = {}
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.timeout = AdaptiveTimeout(
+            minimum=settings.RPC_TIMEOUT_MIN,
+            maximum=settings.RPC_TIMEOUT_MAX,
+            multiplier=settings.RPC_TIMEOUT_MULTIPLIER,
+            window=settings.RPC_LATENCY_WINDOW,
+        )
+        self.breaker = CircuitBreaker(
+            "auth_service",
+            failure_threshold=settings.RPC_BREAKER_FAILURE_THRESHOLD,
+            open_seconds=settings.RPC_BREAKER_OPEN_SECONDS,
+        )
+        # correlation_id -> время отправки для вызовов, завершившихся таймаутом
+        self.timed_out = TTLCache(maxsize=10000, ttl=LATE_REPLY_TTL)
+
+        def pending() -> int:
+            return len(self.futures)
+
+        def timeout() -> float:
+            return self.timeout.value
+
+        RPC_PENDING.set_function(pending)
+        RPC_TIMEOUT.set_function(timeout)
 
     async def connect(self):
+        self.loop = asyncio.get_running_loop()
         self.connection = await aio_pika.connect_robust(self.amqp_url, loop=self.loop)
         self.channel = await self.connection.channel()
         self.callback_queue = await self.channel.declare_queue(exclusive=True)
         await self.callback_queue.consume(self.on_response, no_ack=True)
 
+    async def subscribe_user_deleted(self, handler: Callable[[int], Awaitable[None]]):
+        """Подписывается на события удаления пользователей из auth_service."""
+        exchange = await self.channel.declare_exchange(
+            USER_EVENTS_EXCHANGE, aio_pika.ExchangeType.FANOUT, durable=True
+        )
+        queue = await self.channel.declare_queue(exclusive=True)
+        await queue.bind(exchange)
+
+        async def on_event(message: AbstractIncomingMessage):
+            if message.type == "user.deleted":
+                parent = parse_traceparent((message.headers or {}).get("traceparent"))
+                with tracer.span("consume user.deleted", kind="consumer", parent=parent, child_only=True):
+                    await handler(json.loads(message.body)["user_id"])
+
+        await queue.consume(on_event, no_ack=True)
+
     async def close(self):
-        if self.connection and not self.connection.is_closed():
+        if self.connection and not self.connection.is_closed:
             await self.connection.close()
 
     async def on_response(self, message: AbstractIncomingMessage):
         future = self.futures.pop(message.correlation_id, None)
-        if future:
-            future.set_result(int(message.body.decode()))
-
-    async def call(self, token: str):
+        if future is None:
+            # Ответ пришёл после таймаута: его задержка поднимает адаптивный таймаут
+            RPC_LATE_REPLIES.inc()
+            sent_at = self.timed_out.pop(message.correlation_id)
+            if sent_at is not None:
+                self.timeout.observe(time.perf_counter() - sent_at)
+            return
+        if not future.done():
+            body = message.body.decode()
+            future.set_result(int(body) if body.isdigit() else None)
+
+    async def call(self, token: str) -> int | None:
+        """id пользователя или None, если auth_service не принял токен."""
         if not self.connection or self.connection.is_closed:
-            raise ConnectionError("RPC Client is not connected.")
-        correlation_id = str(uuid.uuid4)
+            RPC_REQUESTS.labels(result="unavailable").inc()
+            raise ServiceUnavailableException(detail="Auth service is unavailable")
+        if not self.breaker.allow():
+            RPC_REQUESTS.labels(result="rejected").inc()
+            raise ServiceUnavailableException(
+                detail="Auth service is unavailable", retry_after=self.breaker.retry_after()
+            )
+
+        correlation_id = str(uuid.uuid4())
         future = self.loop.create_future()
         self.futures[correlation_id] = future
-
-        await self.channel.default_exchange.publish(
-            aio_pika.Message(
-                body=token.encode("utf-8"),
-                correlation_id=correlation_id,
-                reply_to=self.callback_queue.name,
-            ),
-            routing_key="token_check_queue",
-        )
-        try:
-            return await asyncio.wait_for(future, timeout=5.0)
-        except TimeoutError:
-            self.futures.pop(correlation_id, None)
-            return None
+        timeout = self.timeout.value
+        sent_at = time.perf_counter()
+
+        with tracer.span(
+            "rpc token_check_queue", kind="client", **{"messaging.system": "rabbitmq", "rpc.timeout": timeout}
+        ) as span:
+            try:
+                await self.channel.default_exchange.publish(
+                    aio_pika.Message(
+                        body=token.encode("utf-8"),
+                        correlation_id=correlation_id,
+                        reply_to=self.callback_queue.name,
+                        headers=dict(tracer.headers()),
+                    ),
+                    routing_key="token_check_queue",
+                )
+                user_id = await asyncio.wait_for(future, timeout=timeout)
+            except TimeoutError:
+                self.timed_out.set(correlation_id, sent_at)
+                self.breaker.record_failure()
+                RPC_REQUESTS.labels(result="timeout").inc()
+                span.record_error("timeout")
+                raise ServiceUnavailableException(detail="Auth service did not respond in time") from None
+            except (AMQPError, ChannelInvalidStateError, ConnectionError) as e:
+                self.breaker.record_failure()
+                RPC_REQUESTS.labels(result="unavailable").inc()
+                raise ServiceUnavailableException(detail="Auth service is unavailable") from e
+            finally:
+                self.futures.pop(correlation_id, None)
+
+        latency = time.perf_counter() - sent_at
+        RPC_DURATION.observe(latency)
+        RPC_REQUESTS.labels(result="ok").inc()
+        self.timeout.observe(latency)
+        self.breaker.record_success()
+        return user_id
 
 
 class RabbitMQTokenValidator:
-    def __init__(self):
+    def __init__(self, use_cache: bool = settings.TOKEN_CACHE_ENABLED):
         self.rpc_client = RpcClient()
+        self.cache = token_cache if use_cache else None
 
     async def connect(self):
         await self.rpc_client.connect()
+        if self.cache:
+            await self.rpc_client.subscribe_user_deleted(self.cache.invalidate_user)
 
     async def close(self):
         await self.rpc_client.close()
 
     async def validate_token(self, token: str):
-        response = await self.rpc_client.call(token=token)
+        if self.cache:
+            response = await self.cache.get_or_load(token, self.rpc_client.call)
+        else:
+            response = await self.rpc_client.call(token=token)
         if not response:
             return None
         return response
@@ -0,0 +1,104 @@
+"""
+Таймаут и circuit breaker для RPC к auth_service.
+
+Таймаут подстраивается под наблюдаемую задержку: p99 последних ответов с запасом,
+в заданных пределах. Breaker размыкается после серии таймаутов подряд - пока
+auth_service не отвечает, запросы получают 503 сразу, а не висят до таймаута.
+Через RPC_BREAKER_OPEN_SECONDS пропускается один пробный вызов: успех замыкает
+цепь, неудача снова размыкает её.
+"""
+
+import math
+import time
+from collections import deque
+
+from prometheus_client import Gauge
+
+CIRCUIT_STATE = Gauge("rpc_circuit_state", "Circuit breaker state: 0 closed, 1 half-open, 2 open", ["name"])
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Перцентиль пересчитывается раз в столько ответов, а не на каждый вызов
+RECOMPUTE_EVERY = 10
+
+
+class AdaptiveTimeout:
+    """
+    Таймаут = p99 задержки последних `window` ответов * `multiplier`, в пределах
+    [minimum, maximum]. Пока ответов меньше `min_samples`, действует maximum.
+    """
+
+    def __init__(
+        self, *, minimum: float, maximum: float, multiplier: float, window: int, min_samples: int = 50
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.samples: deque[float] = deque(maxlen=window)
+        self.observed = 0
+        self.value = maximum
+
+    def observe(self, latency: float):
+        self.samples.append(latency)
+        self.observed += 1
+        if len(self.samples) >= self.min_samples and self.observed % RECOMPUTE_EVERY == 0:
+            self.value = min(self.maximum, max(self.minimum, self.percentile(0.99) * self.multiplier))
+
+    def percentile(self, q: float) -> float:
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else 0.0
+
+
+class CircuitBreaker:
+    """Circuit breaker по числу ошибок подряд: closed -> open -> half_open -> closed."""
+
+    def __init__(self, name: str, failure_threshold: int, open_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_at = -math.inf
+        CIRCUIT_STATE.labels(name=name).set(STATE_VALUES[CLOSED])
+
+    def _set_state(self, state: str):
+        if state == self.state:
+            return
+        print(f"Circuit breaker {self.name}: {self.state} -> {state}")
+        self.state = state
+        CIRCUIT_STATE.labels(name=self.name).set(STATE_VALUES[state])
+
+    def allow(self) -> bool:
+        """Можно ли выполнить вызов; в half_open - один пробный."""
+        now = time.monotonic()
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if now - self.opened_at < self.open_seconds:
+                return False
+            self._set_state(HALF_OPEN)
+        # Пробный вызов мог быть отменён и не сообщить результат - тогда через open_seconds пускаем новый
+        if now - self.probe_at < self.open_seconds:
+            return False
+        self.probe_at = now
+        return True
+
+    def retry_after(self) -> int:
+        """Сколько секунд до следующего пробного вызова, для заголовка Retry-After."""
+        remaining = self.open_seconds - (time.monotonic() - max(self.opened_at, self.probe_at))
+        return max(1, math.ceil(remaining))
+
+    def record_success(self):
+        self.failures = 0
+        self.probe_at = -math.inf
+        self._set_state(CLOSED)
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self.probe_at = -math.inf
+            self._set_state(OPEN)
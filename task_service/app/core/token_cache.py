@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import time
+from collections.abc import Awaitable, Callable
+
+import jwt
+import redis.asyncio as redis
+
+from shared.lru import TTLCache
+from task_service.app.core.config import settings
+from task_service.app.core.redis_client import redis_client
+
+KEY_PREFIX = "token_cache"
+
+
+class TokenCache:
+    """
+    Двухуровневый кэш token -> user_id: LRU в памяти процесса и общий Redis.
+
+    Ключ - sha256 токена, TTL не превышает оставшийся срок жизни токена (`exp`).
+    Одновременные запросы одного и того же токена объединяются в один RPC.
+    При удалении пользователя его записи сбрасываются из обоих уровней.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.ttl = ttl
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.inflight: dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def hash_token(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def ttl_for(self, token: str) -> int:
+        """Сколько секунд можно держать токен в кэше (0 - нельзя)."""
+        try:
+            exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+        except jwt.PyJWTError:
+            return 0
+        if not isinstance(exp, int | float):
+            return 0
+        return max(0, min(self.ttl, int(exp - time.time())))
+
+    async def get_or_load(self, token: str, loader: Callable[[str], Awaitable[int | None]]) -> int | None:
+        key = self.hash_token(token)
+        user_id = self.local.get(key)
+        if user_id is not None:
+            return user_id
+
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, token, loader))
+            self.inflight[key] = task
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, token: str, loader: Callable[[str], Awaitable[int | None]]) -> int | None:
+        ttl = self.ttl_for(token)
+        user_id = await self._redis_get(key) if ttl else None
+        if user_id is None:
+            user_id = await loader(token)
+            if user_id and ttl:
+                await self._redis_set(key, user_id, ttl)
+        if user_id and ttl:
+            self.local.set(key, user_id, ttl=ttl)
+        return user_id
+
+    async def _redis_get(self, key: str) -> int | None:
+        if not redis_client.client:
+            return None
+        try:
+            value = await redis_client.client.get(f"{KEY_PREFIX}:{key}")
+        except redis.RedisError as e:
+            print(f"Ошибка чтения кэша токенов: {e}")
+            return None
+        return int(value) if value else None
+
+    async def _redis_set(self, key: str, user_id: int, ttl: int):
+        if not redis_client.client:
+            return
+        user_key = f"{KEY_PREFIX}:user:{user_id}"
+        try:
+            async with redis_client.client.pipeline(transaction=False) as pipe:
+                pipe.set(f"{KEY_PREFIX}:{key}", user_id, ex=ttl)
+                pipe.sadd(user_key, key)
+                pipe.expire(user_key, self.ttl)
+                await pipe.execute()
+        except redis.RedisError as e:
+            print(f"Ошибка записи кэша токенов: {e}")
+
+    async def invalidate_user(self, user_id: int):
+        """Сбрасывает все закэшированные токены пользователя."""
+        for key, value in self.local.items():
+            if value == user_id:
+                self.local.pop(key)
+
+        if not redis_client.client:
+            return
+        user_key = f"{KEY_PREFIX}:user:{user_id}"
+        try:
+            keys = await redis_client.client.smembers(user_key)
+            await redis_client.client.delete(user_key, *(f"{KEY_PREFIX}:{key}" for key in keys))
+        except redis.RedisError as e:
+            print(f"Ошибка сброса кэша токенов: {e}")
+
+
+token_cache = TokenCache(maxsize=settings.TOKEN_CACHE_MAX_SIZE, ttl=settings.TOKEN_CACHE_TTL)
@@ -1,23 +1,31 @@
 # pylint:disable=unused-argument,redefined-outer-name,global-statement,duplicate-code
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from shared.metrics import PrometheusMiddleware, metrics_response
+from shared.tracing import TracingMiddleware, setup_tracing
 from task_service.app.api.routers.tasks import router as task_router
-from task_service.app.core.limiter import init_limiter
-from task_service.app.core.rabbitmq import user_validator_instance
+from task_service.app.core.jwt_validator import token_validator_instance
 from task_service.app.core.redis_client import redis_client
+from task_service.app.services.cache import task_cache
+
+setup_tracing("task_service")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await redis_client.connect()
-    await init_limiter()
-    await user_validator_instance.connect()
+    redis_monitor = asyncio.create_task(redis_client.monitor())
+    await token_validator_instance.connect()
+    invalidation_listener = asyncio.create_task(task_cache.listen_invalidations())
     yield
+    invalidation_listener.cancel()
+    redis_monitor.cancel()
     await redis_client.close()
-    await user_validator_instance.close()
+    await token_validator_instance.close()
 
 
 app = FastAPI(title="FastAPI task service - сервис задач", version="0.1.0", lifespan=lifespan)
@@ -30,5 +38,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(PrometheusMiddleware, service="task_service")
+app.add_middleware(TracingMiddleware)
 
 app.include_router(task_router)
+
+
+@app.get("/metrics")
+async def metrics():
+    return metrics_response()
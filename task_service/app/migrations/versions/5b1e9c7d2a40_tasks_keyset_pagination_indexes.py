@@ -0,0 +1,48 @@
+"""tasks keyset pagination indexes
+
+Revision ID: 5b1e9c7d2a40
+Revises: 23f70f51f040
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5b1e9c7d2a40"
+down_revision: str | Sequence[str] | None = "23f70f51f040"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Индексы строятся CONCURRENTLY, чтобы не блокировать запись в большую таблицу
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tasks_user_created_active",
+            "tasks",
+            ["user_id", "created_at", "id"],
+            postgresql_where=sa.text("is_active"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_tasks_user_status_created_active",
+            "tasks",
+            ["user_id", "status", "created_at", "id"],
+            postgresql_where=sa.text("is_active"),
+            postgresql_concurrently=True,
+        )
+        # Дублирует первичный ключ
+        op.drop_index("ix_tasks_id", table_name="tasks", postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index("ix_tasks_id", "tasks", ["id"], unique=True, postgresql_concurrently=True)
+        op.drop_index("ix_tasks_user_status_created_active", table_name="tasks", postgresql_concurrently=True)
+        op.drop_index("ix_tasks_user_created_active", table_name="tasks", postgresql_concurrently=True)
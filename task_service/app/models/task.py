@@ -1,7 +1,7 @@
 import datetime
 import enum
 
-from sqlalchemy import Boolean, DateTime, Enum, Integer, String
+from sqlalchemy import Boolean, DateTime, Enum, Index, Integer, String, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from task_service.app.core.database import Base
@@ -16,12 +16,29 @@ class TaskStatus(enum.Enum):
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Keyset-пагинация списка задач пользователя: ORDER BY created_at DESC, id DESC
+        Index(
+            "ix_tasks_user_created_active",
+            "user_id",
+            "created_at",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+        # То же с фильтром по статусу
+        Index(
+            "ix_tasks_user_status_created_active",
+            "user_id",
+            "status",
+            "created_at",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(
         Integer,
         autoincrement=True,
-        unique=True,
-        index=True,
         nullable=False,
         primary_key=True,
     )
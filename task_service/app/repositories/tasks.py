@@ -1,7 +1,12 @@
-from sqlalchemy import select, update
+import datetime
+from collections.abc import Sequence
+
+from sqlalchemy import Integer, RowMapping, Select, any_, insert, literal, select, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from task_service.app.models.task import Task as TaskModel
+from task_service.app.models.task import TaskStatus
 from task_service.app.schemas.tasks import TaskCreate
 
 
@@ -9,12 +14,54 @@ class TaskRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def get_all(self, user_id) -> list[TaskModel]:
-        result = await self.db.scalars(
-            select(TaskModel).where(TaskModel.is_active == True, TaskModel.user_id == user_id)
-        )
-        tasks = result.all()
-        return tasks
+    @staticmethod
+    def _page_query(
+        query: Select,
+        user_id: int,
+        limit: int,
+        status: TaskStatus | None,
+        after: tuple[datetime.datetime, int] | None,
+    ) -> Select:
+        query = query.where(TaskModel.is_active == True, TaskModel.user_id == user_id)
+        if status is not None:
+            query = query.where(TaskModel.status == status)
+        if after is not None:
+            query = query.where(tuple_(TaskModel.created_at, TaskModel.id) < tuple_(*after))
+        return query.order_by(TaskModel.created_at.desc(), TaskModel.id.desc()).limit(limit)
+
+    async def get_page(
+        self,
+        user_id: int,
+        limit: int,
+        status: TaskStatus | None = None,
+        after: tuple[datetime.datetime, int] | None = None,
+    ) -> list[TaskModel]:
+        """
+        Страница активных задач пользователя, новые первыми.
+
+        `after` - (created_at, id) последней задачи предыдущей страницы. Запрос
+        идёт по индексу ix_tasks_user_(status_)created_active и не зависит от
+        того, насколько далеко страница от начала списка.
+        """
+        result = await self.db.scalars(self._page_query(select(TaskModel), user_id, limit, status, after))
+        return list(result.all())
+
+    async def get_page_rows(
+        self,
+        columns: Sequence[str],
+        user_id: int,
+        limit: int,
+        *,
+        status: TaskStatus | None = None,
+        after: tuple[datetime.datetime, int] | None = None,
+    ) -> Sequence[RowMapping]:
+        """
+        То же, что get_page, но только с указанными колонками: строки не попадают
+        в identity map сессии и не превращаются в ORM-объекты.
+        """
+        query = select(*(getattr(TaskModel, column) for column in columns))
+        result = await self.db.execute(self._page_query(query, user_id, limit, status, after))
+        return result.mappings().all()
 
     async def get_by_id(self, task_id: int, user_id) -> TaskModel | None:
         result = await self.db.scalars(
@@ -53,3 +100,50 @@ class TaskRepository:
         )
         await self.db.commit()
         return result.rowcount > 0
+
+    async def bulk_create(self, tasks: list[TaskCreate]) -> list[TaskModel]:
+        """Создаёт задачи одним INSERT ... RETURNING в одной транзакции, в порядке запроса."""
+        result = await self.db.scalars(
+            insert(TaskModel).returning(TaskModel, sort_by_parameter_order=True),
+            [task.model_dump() for task in tasks],
+        )
+        created = list(result.all())
+        await self.db.commit()
+        return created
+
+    async def bulk_update(self, changes: list[tuple[list[int], dict]], user_id: int) -> dict[int, TaskModel]:
+        """
+        Применяет изменения в одной транзакции: каждая пара (ids, values) - один
+        UPDATE ... WHERE id = ANY(ids). Возвращает обновлённые задачи по id.
+        """
+        updated = {}
+        for ids, values in changes:
+            result = await self.db.scalars(
+                update(TaskModel)
+                .where(
+                    TaskModel.id == any_(literal(ids, ARRAY(Integer))),
+                    TaskModel.user_id == user_id,
+                    TaskModel.is_active == True,
+                )
+                .values(**values)
+                .returning(TaskModel)
+            )
+            updated.update((task.id, task) for task in result.all())
+        await self.db.commit()
+        return updated
+
+    async def bulk_delete(self, ids: list[int], user_id: int) -> set[int]:
+        """Мягко удаляет задачи одним UPDATE и возвращает id удалённых."""
+        result = await self.db.scalars(
+            update(TaskModel)
+            .where(
+                TaskModel.id == any_(literal(ids, ARRAY(Integer))),
+                TaskModel.user_id == user_id,
+                TaskModel.is_active == True,
+            )
+            .values(is_active=False)
+            .returning(TaskModel.id)
+        )
+        deleted = set(result.all())
+        await self.db.commit()
+        return deleted
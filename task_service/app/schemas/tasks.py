@@ -1,8 +1,9 @@
 import datetime
-from typing import Annotated
+from typing import Annotated, Literal
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 
+from task_service.app.core.config import settings
 from task_service.app.models.task import TaskStatus
 
 
@@ -27,10 +28,125 @@ class Task(BaseModel):
     id: Annotated[int, Field(description="Индификатор задачи")]
     name: str
     status: TaskStatus
-    description: str
+    description: str | None
     user_id: int
     is_active: bool
     created_at: datetime.datetime
     updated_at: datetime.datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class TaskPage(BaseModel):
+    items: list[Task]
+    next_cursor: Annotated[
+        str | None,
+        Field(default=None, description="Курсор следующей страницы; null - страниц больше нет"),
+    ]
+
+
+TASK_FIELDS = tuple(Task.model_fields)
+SUMMARY_FIELDS = ("id", "name", "status", "created_at", "updated_at")
+
+
+class TaskListParams(BaseModel):
+    limit: Annotated[int, Field(ge=1, le=settings.TASKS_PAGE_MAX_LIMIT)] = settings.TASKS_PAGE_DEFAULT_LIMIT
+    status: TaskStatus | None = None
+    cursor: Annotated[str | None, Field(max_length=200)] = None
+    fields: Annotated[
+        str | None,
+        Field(description=f"Поля задачи через запятую: {', '.join(TASK_FIELDS)}"),
+    ] = None
+    view: Annotated[
+        Literal["full", "summary"],
+        Field(description="summary - задачи без description и служебных полей"),
+    ] = "full"
+
+    @field_validator("fields")
+    @classmethod
+    def validate_fields(cls, value: str | None):
+        if value is None:
+            return None
+        requested = [field.strip() for field in value.split(",") if field.strip()]
+        unknown = [field for field in requested if field not in TASK_FIELDS]
+        if not requested or unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}; allowed: {', '.join(TASK_FIELDS)}")
+        return ",".join(dict.fromkeys(requested))
+
+    @property
+    def columns(self) -> list[str] | None:
+        """Запрошенные поля или None, если нужны задачи целиком."""
+        if self.fields:
+            return self.fields.split(",")
+        if self.view == "summary":
+            return list(SUMMARY_FIELDS)
+        return None
+
+
+class TaskBulkCreate(BaseModel):
+    items: Annotated[list[TaskCreate], Field(min_length=1, max_length=settings.TASKS_BULK_MAX_ITEMS)]
+
+
+class TaskBulkUpdateItem(BaseModel):
+    """Частичное изменение задачи: меняются только переданные поля."""
+
+    id: Annotated[int, Field(ge=1)]
+    name: Annotated[str | None, Field(default=None, min_length=3, max_length=50)]
+    status: TaskStatus | None = None
+    description: Annotated[str | None, Field(default=None, max_length=20000)]
+
+    @field_validator("name")
+    @classmethod
+    def validate_name(cls, value: str | None):
+        if value is None:
+            raise ValueError("Value cannot be null")
+        if not value.strip():
+            raise ValueError("Value cannot be empty or whitespace only")
+        return value.strip()
+
+    @field_validator("status")
+    @classmethod
+    def validate_status(cls, value: TaskStatus | None):
+        if value is None:
+            raise ValueError("Value cannot be null")
+        return value
+
+    @model_validator(mode="after")
+    def validate_changes(self):
+        if not self.model_fields_set - {"id"}:
+            raise ValueError("Nothing to update")
+        return self
+
+
+class TaskBulkUpdate(BaseModel):
+    items: Annotated[list[TaskBulkUpdateItem], Field(min_length=1, max_length=settings.TASKS_BULK_MAX_ITEMS)]
+
+    @field_validator("items")
+    @classmethod
+    def validate_unique_ids(cls, value: list[TaskBulkUpdateItem]):
+        # Изменения группируются в UPDATE по значениям: порядок двух изменений одной задачи не определён
+        seen, duplicates = set(), []
+        for item in value:
+            if item.id in seen:
+                duplicates.append(str(item.id))
+            seen.add(item.id)
+        if duplicates:
+            raise ValueError(f"Duplicate task ids: {', '.join(dict.fromkeys(duplicates))}")
+        return value
+
+
+class TaskBulkDelete(BaseModel):
+    ids: Annotated[
+        list[Annotated[int, Field(ge=1)]], Field(min_length=1, max_length=settings.TASKS_BULK_MAX_ITEMS)
+    ]
+
+
+class TaskBulkItemResult(BaseModel):
+    index: Annotated[int, Field(description="Позиция элемента в запросе")]
+    id: int | None = None
+    result: Literal["created", "updated", "deleted", "not_found", "forbidden"]
+    task: Task | None = None
+
+
+class TaskBulkResponse(BaseModel):
+    results: list[TaskBulkItemResult]
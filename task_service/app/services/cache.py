@@ -0,0 +1,410 @@
+# pylint:disable=too-many-instance-attributes
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+
+import redis.asyncio as redis
+from prometheus_client import Counter
+from pydantic import BaseModel
+
+from shared.lru import TTLCache
+from task_service.app.core.config import settings
+from task_service.app.core.redis_client import redis_client
+from task_service.app.schemas.tasks import Task as TaskSchema
+
+TASK_CACHE_REQUESTS = Counter(
+    "task_cache_requests_total",
+    "Task cache lookups by kind (item, list) and result (hit, negative_hit, early_refresh, miss, error)",
+    ["kind", "result"],
+)
+TASK_CACHE_COALESCED = Counter(
+    "task_cache_coalesced_total",
+    "Task cache misses served by another request's load instead of the database",
+    ["scope"],
+)
+
+TASK_CACHE_LOCAL_HITS = Counter(
+    "task_cache_local_hits_total",
+    "Task cache lookups served from the in-process L1 cache without a Redis round-trip",
+    ["kind"],
+)
+
+INVALIDATION_CHANNEL = "task_cache:invalidate"
+# Сколько ждать сообщения подписки за одно чтение, секунды. Явный таймаут чтения
+# не рвёт соединение, в отличие от REDIS_SOCKET_TIMEOUT пула, который в listen()
+# на тихом канале приводил к переподключению и потере сообщений
+INVALIDATION_POLL_TIMEOUT = 5.0
+
+# Снимает блокировку, только если она всё ещё наша
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Записывает результат загрузки из БД, только если версия задач пользователя не изменилась
+# с момента перед запросом в БД: иначе запись уже перезаписала или стёрла ключ (invalidate)
+# KEYS[1] - ключ задачи, KEYS[2] - версия; ARGV[1] - прочитанная версия, ARGV[2] - значение, ARGV[3] - TTL
+SET_IF_VERSION_SCRIPT = """
+if (redis.call("get", KEYS[2]) or "0") ~= ARGV[1] then
+    return 0
+end
+redis.call("set", KEYS[1], ARGV[2], "EX", ARGV[3])
+return 1
+"""
+
+
+class CacheEntry(BaseModel):
+    """Запись кэша задачи; task=None - задачи нет (негативная запись)."""
+
+    task: TaskSchema | None
+    # Сколько секунд заняла загрузка из БД - для раннего обновления (XFetch)
+    delta: float = 0.0
+    expires_at: float
+
+
+class TaskCache:
+    """
+    Кэш задач в Redis. Единственный формат значений - JSON через pydantic-схемы.
+
+    Задача лежит под `task:{user_id}:{task_id}`: изменение перезаписывает запись,
+    удаление её стирает. Страницы списка лежат под `tasks:{user_id}:v{version}:{params}`;
+    любая запись пользователя увеличивает `tasks:{user_id}:version`, и старые
+    страницы просто перестают читаться, пока не истечёт их TTL.
+
+    Промах по задаче не превращается в лавину запросов к БД: одновременные промахи
+    в процессе ждут одну загрузку, между репликами загрузку выполняет тот, кто взял
+    блокировку `lock:{key}`, остальные ждут появления записи. Незадолго до истечения
+    TTL запись с вероятностью, растущей к концу срока, обновляется заранее (XFetch),
+    пока остальные запросы получают ещё действующее значение. Отсутствующие задачи
+    кэшируются на `negative_ttl` секунд. Загруженное из БД записывается, только
+    если версия пользователя не сдвинулась за время загрузки - иначе чтение,
+    начатое до записи, вернуло бы в кэш устаревшую задачу.
+
+    Если передан `local`, перед Redis стоит L1 - TTLCache в памяти процесса.
+    Записи реплики рассылают изменённые ключи в канал INVALIDATION_CHANNEL, и
+    `listen_invalidations` сбрасывает их из L1 остальных реплик. L1 работает только
+    пока подписка активна; после обрыва L1 очищается, так как сообщения могли потеряться.
+
+    Ошибки Redis не роняют запрос: чтение считается промахом, запись пропускается.
+    """
+
+    def __init__(
+        self,
+        ttl: int,
+        list_ttl: int,
+        *,
+        negative_ttl: int = 5,
+        lock_ttl: float = 5.0,
+        lock_wait: float = 1.0,
+        early_refresh_beta: float = 1.0,
+        local: TTLCache | None = None,
+    ):
+        self.ttl = ttl
+        self.list_ttl = list_ttl
+        self.negative_ttl = negative_ttl
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+        self.early_refresh_beta = early_refresh_beta
+        self.inflight: dict[str, asyncio.Task] = {}
+        self.local = local
+        self.local_ready = False
+
+    @staticmethod
+    def item_key(user_id: int, task_id: int) -> str:
+        return f"task:{user_id}:{task_id}"
+
+    @staticmethod
+    def version_key(user_id: int) -> str:
+        return f"tasks:{user_id}:version"
+
+    @staticmethod
+    def list_key(user_id: int, version: int, params: str) -> str:
+        digest = hashlib.sha1(params.encode()).hexdigest()
+        return f"tasks:{user_id}:v{version}:{digest}"
+
+    async def get_or_load_task(
+        self, user_id: int, task_id: int, loader: Callable[[], Awaitable[TaskSchema | None]]
+    ) -> TaskSchema | None:
+        key = self.item_key(user_id, task_id)
+        entry = await self._get_entry(key)
+        if entry is not None:
+            if not self._should_refresh_early(entry):
+                result = "hit" if entry.task else "negative_hit"
+                TASK_CACHE_REQUESTS.labels(kind="item", result=result).inc()
+                return entry.task
+            TASK_CACHE_REQUESTS.labels(kind="item", result="early_refresh").inc()
+        else:
+            TASK_CACHE_REQUESTS.labels(kind="item", result="miss").inc()
+
+        flight = self.inflight.get(key)
+        if flight is None:
+            flight = asyncio.create_task(self._load(key, self.version_key(user_id), loader, stale=entry))
+            self.inflight[key] = flight
+            flight.add_done_callback(lambda _: self.inflight.pop(key, None))
+        else:
+            TASK_CACHE_COALESCED.labels(scope="process").inc()
+        return await asyncio.shield(flight)
+
+    def _should_refresh_early(self, entry: CacheEntry) -> bool:
+        """XFetch: now - delta * beta * ln(rand) >= expiry."""
+        if entry.task is None or entry.delta <= 0:
+            return False
+        jitter = -entry.delta * self.early_refresh_beta * math.log(1.0 - random.random())
+        return time.time() + jitter >= entry.expires_at
+
+    async def _load(
+        self,
+        key: str,
+        version_key: str,
+        loader: Callable[[], Awaitable[TaskSchema | None]],
+        stale: CacheEntry | None,
+    ) -> TaskSchema | None:
+        token = await self._acquire_lock(key)
+        if token is None:
+            # Загрузку уже выполняет другая реплика
+            if stale is not None:
+                return stale.task
+            entry = await self._wait_for_entry(key)
+            if entry is not None:
+                TASK_CACHE_COALESCED.labels(scope="redis").inc()
+                return entry.task
+
+        try:
+            version = await self._get_version(version_key)
+            started = time.monotonic()
+            task = await loader()
+            delta = time.monotonic() - started
+            await self._set_entry(key, task, version_key=version_key, version=version, delta=delta)
+            return task
+        finally:
+            if token:
+                await self._release_lock(key, token)
+
+    async def _get_entry(self, key: str) -> CacheEntry | None:
+        entry = self._local_get(key, kind="item")
+        if entry is not None:
+            return entry
+        client = redis_client.client
+        if not client:
+            return None
+        try:
+            cached = await client.get(key)
+        except redis.RedisError as e:
+            print(f"Ошибка чтения кэша задач: {e}")
+            TASK_CACHE_REQUESTS.labels(kind="item", result="error").inc()
+            return None
+        if not cached:
+            return None
+        entry = CacheEntry.model_validate_json(cached)
+        self._local_set(key, entry, expires_at=entry.expires_at)
+        return entry
+
+    async def _get_version(self, version_key: str) -> str | None:
+        """Версия задач пользователя; None - Redis недоступен."""
+        client = redis_client.client
+        if not client:
+            return None
+        try:
+            return await client.get(version_key) or "0"
+        except redis.RedisError as e:
+            print(f"Ошибка чтения кэша задач: {e}")
+            return None
+
+    async def _set_entry(
+        self, key: str, task: TaskSchema | None, *, version_key: str, version: str | None, delta: float = 0.0
+    ):
+        client = redis_client.client
+        if not client or version is None:
+            return
+        entry = self._entry(task, delta)
+        try:
+            value, ttl = entry.model_dump_json(), self._ttl_for(task)
+            stored = await client.eval(SET_IF_VERSION_SCRIPT, 2, key, version_key, version, value, ttl)
+        except redis.RedisError as e:
+            print(f"Ошибка записи кэша задач: {e}")
+            return
+        if stored:
+            self._local_set(key, entry, expires_at=entry.expires_at)
+
+    def _ttl_for(self, task: TaskSchema | None) -> int:
+        return self.ttl if task else self.negative_ttl
+
+    def _entry(self, task: TaskSchema | None, delta: float = 0.0) -> CacheEntry:
+        return CacheEntry(task=task, delta=delta, expires_at=time.time() + self._ttl_for(task))
+
+    def _local_get(self, key: str, kind: str):
+        if self.local is None or not self.local_ready:
+            return None
+        value = self.local.get(key)
+        if value is not None:
+            TASK_CACHE_LOCAL_HITS.labels(kind=kind).inc()
+        return value
+
+    def _local_set(self, key: str, value, expires_at: float | None = None):
+        """Кладёт значение в L1, не дольше его срока жизни в Redis."""
+        if self.local is None or not self.local_ready:
+            return
+        ttl = self.local.ttl if expires_at is None else min(self.local.ttl, expires_at - time.time())
+        if ttl > 0:
+            self.local.set(key, value, ttl=ttl)
+
+    async def _acquire_lock(self, key: str) -> str | None:
+        """
+        Токен взятой блокировки; None - блокировку держит другой процесс;
+        пустая строка - Redis недоступен, загружать без блокировки.
+        """
+        client = redis_client.client
+        if not client:
+            return ""
+        token = uuid.uuid4().hex
+        try:
+            acquired = await client.set(f"lock:{key}", token, nx=True, px=int(self.lock_ttl * 1000))
+        except redis.RedisError as e:
+            print(f"Ошибка блокировки кэша задач: {e}")
+            return ""
+        return token if acquired else None
+
+    async def _release_lock(self, key: str, token: str):
+        try:
+            await redis_client.client.eval(RELEASE_LOCK_SCRIPT, 1, f"lock:{key}", token)
+        except redis.RedisError as e:
+            print(f"Ошибка снятия блокировки кэша задач: {e}")
+
+    async def _wait_for_entry(self, key: str) -> CacheEntry | None:
+        deadline = time.monotonic() + self.lock_wait
+        delay = 0.01
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            entry = await self._get_entry(key)
+            if entry is not None:
+                return entry
+            delay = min(delay * 2, 0.1)
+        return None
+
+    async def get_list(self, user_id: int, params: str) -> tuple[str | None, int]:
+        """Возвращает закэшированную страницу (JSON) и текущую версию списка пользователя."""
+        version = self._local_get(self.version_key(user_id), kind="version")
+        if version is not None:
+            cached = self._local_get(self.list_key(user_id, version, params), kind="list")
+            if cached is not None:
+                TASK_CACHE_REQUESTS.labels(kind="list", result="hit").inc()
+                return cached, version
+
+        client = redis_client.client
+        if not client:
+            return None, 0
+        try:
+            if version is None:
+                version = int(await client.get(self.version_key(user_id)) or 0)
+                self._local_set(self.version_key(user_id), version)
+            key = self.list_key(user_id, version, params)
+            cached = await client.get(key)
+        except redis.RedisError as e:
+            print(f"Ошибка чтения кэша задач: {e}")
+            TASK_CACHE_REQUESTS.labels(kind="list", result="error").inc()
+            return None, 0
+        TASK_CACHE_REQUESTS.labels(kind="list", result="hit" if cached else "miss").inc()
+        if cached:
+            self._local_set(key, cached, expires_at=time.time() + self.list_ttl)
+        return cached, version
+
+    async def set_list(self, user_id: int, version: int, params: str, page: str):
+        key = self.list_key(user_id, version, params)
+        self._local_set(key, page, expires_at=time.time() + self.list_ttl)
+        client = redis_client.client
+        if not client:
+            return
+        try:
+            await client.set(key, page, ex=self.list_ttl)
+        except redis.RedisError as e:
+            print(f"Ошибка записи кэша задач: {e}")
+
+    async def invalidate(
+        self, user_id: int, *, updated: list[TaskSchema] | None = None, deleted: list[int] | None = None
+    ):
+        """
+        После записи: перезаписывает изменённые задачи, стирает удалённые,
+        сдвигает версию списков пользователя и оповещает другие реплики - одним pipeline.
+        """
+        entries = {self.item_key(user_id, task.id): self._entry(task) for task in updated or []}
+        removed = [self.item_key(user_id, task_id) for task_id in deleted or []]
+        self._drop_local([*entries, *removed, self.version_key(user_id)])
+        for key, entry in entries.items():
+            self._local_set(key, entry, expires_at=entry.expires_at)
+
+        client = redis_client.client
+        if not client:
+            return
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for key, entry in entries.items():
+                    pipe.set(key, entry.model_dump_json(), ex=self.ttl)
+                for key in removed:
+                    pipe.delete(key)
+                pipe.incr(self.version_key(user_id))
+                if self.local is not None:
+                    keys = [*entries, *removed, self.version_key(user_id)]
+                    pipe.publish(INVALIDATION_CHANNEL, json.dumps({"keys": keys}))
+                await pipe.execute()
+        except redis.RedisError as e:
+            print(f"Ошибка инвалидации кэша задач: {e}")
+
+    def _drop_local(self, keys: list[str]):
+        if self.local is None:
+            return
+        for key in keys:
+            self.local.pop(key)
+
+    async def listen_invalidations(self):
+        """
+        Фоновая задача из lifespan: держит подписку на INVALIDATION_CHANNEL и
+        сбрасывает из L1 ключи, изменённые другими репликами. При обрыве
+        переподключается с экспоненциальной задержкой.
+        """
+        if self.local is None:
+            return
+        delay = 0.5
+        while True:
+            client = redis_client.client
+            if client:
+                try:
+                    async with client.pubsub() as pubsub:
+                        await pubsub.subscribe(INVALIDATION_CHANNEL)
+                        self.local.clear()
+                        self.local_ready = True
+                        delay = 0.5
+                        while True:
+                            message = await pubsub.get_message(
+                                ignore_subscribe_messages=True, timeout=INVALIDATION_POLL_TIMEOUT
+                            )
+                            if message and message["type"] == "message":
+                                self._drop_local(json.loads(message["data"])["keys"])
+                except redis.RedisError as e:
+                    print(f"Подписка на инвалидацию кэша задач оборвалась: {e}")
+                finally:
+                    self.local_ready = False
+                    self.local.clear()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+
+task_cache = TaskCache(
+    ttl=settings.TASK_CACHE_TTL,
+    list_ttl=settings.TASK_LIST_CACHE_TTL,
+    negative_ttl=settings.TASK_NEGATIVE_CACHE_TTL,
+    lock_ttl=settings.TASK_CACHE_LOCK_TTL,
+    lock_wait=settings.TASK_CACHE_LOCK_WAIT,
+    early_refresh_beta=settings.TASK_CACHE_EARLY_REFRESH_BETA,
+    local=(
+        TTLCache(maxsize=settings.TASK_L1_CACHE_MAX_SIZE, ttl=settings.TASK_L1_CACHE_TTL)
+        if settings.TASK_L1_CACHE_ENABLED
+        else None
+    ),
+)
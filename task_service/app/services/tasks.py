@@ -1,48 +1,163 @@
+import base64
+import binascii
+import datetime
 import json
 
-import redis.asyncio as redis
+from pydantic_core import to_json
 
+from task_service.app.core.exceptions import BadRequestException, NotFoundException
 from task_service.app.models.task import Task as TaskModel
 from task_service.app.repositories.tasks import TaskRepository
 from task_service.app.schemas.tasks import Task as TaskSchema
-from task_service.app.schemas.tasks import TaskCreate
+from task_service.app.schemas.tasks import (
+    TaskBulkItemResult,
+    TaskBulkUpdateItem,
+    TaskCreate,
+    TaskListParams,
+    TaskPage,
+)
+from task_service.app.services.cache import TaskCache
+
+
+def encode_cursor(created_at: datetime.datetime, task_id: int) -> str:
+    """Непрозрачный курсор из (created_at, id) последней задачи страницы."""
+    raw = json.dumps([created_at.isoformat(), task_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, task_id = json.loads(raw)
+        return datetime.datetime.fromisoformat(created_at), int(task_id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise BadRequestException(detail="Invalid cursor") from e
 
 
 class TaskService:
-    def __init__(self, task_repository: TaskRepository):
+    def __init__(self, task_repository: TaskRepository, cache: TaskCache):
         self.task_repository = task_repository
+        self.cache = cache
 
-    async def get_tasks(self, user_id: int) -> list[TaskModel]:
-        return await self.task_repository.get_all(user_id=user_id)
-
-    async def get_task_by_id(
-        self, task_id: int, user_id: int, r: redis.Redis
-    ) -> TaskModel | TaskSchema | None:
-        cache_key = f"task:{task_id}-user:{user_id}"
-        cached = await r.get(cache_key)
+    async def list_tasks_json(self, user_id: int, params: TaskListParams) -> str:
+        """Страница задач в виде готового JSON - из кэша или из БД с записью в кэш."""
+        cache_params = params.model_dump_json()
+        cached, version = await self.cache.get_list(user_id, cache_params)
         if cached:
-            data = json.loads(cached)
-            return TaskSchema.model_validate_json(data)
-        task_model = await self.task_repository.get_by_id(task_id=task_id, user_id=user_id)
-        if not task_model:
-            raise ValueError("...")
-        task_schema = TaskSchema.model_validate(task_model)
-        task_json = json.dumps(task_schema.model_dump_json())
-        await r.setex(name=cache_key, value=task_json, time=60)
-        return task_model
+            return cached
+        if params.columns:
+            page = to_json(await self.get_task_rows(user_id=user_id, params=params)).decode()
+        else:
+            page = (await self.get_tasks(user_id=user_id, params=params)).model_dump_json()
+        await self.cache.set_list(user_id, version, cache_params, page)
+        return page
+
+    async def get_tasks(self, user_id: int, params: TaskListParams) -> TaskPage:
+        after = decode_cursor(params.cursor) if params.cursor else None
+        # Лишняя строка показывает, есть ли следующая страница, без COUNT(*)
+        tasks = await self.task_repository.get_page(
+            user_id=user_id, limit=params.limit + 1, status=params.status, after=after
+        )
+        last = tasks[params.limit - 1] if len(tasks) > params.limit else None
+        next_cursor = encode_cursor(last.created_at, last.id) if last else None
+        return TaskPage(items=tasks[: params.limit], next_cursor=next_cursor)
+
+    async def get_task_rows(self, user_id: int, params: TaskListParams) -> dict:
+        """
+        Страница задач только с полями `params.columns` - словари из строк
+        без ORM-объектов и валидации через схему Task.
+        """
+        fields = params.columns
+        after = decode_cursor(params.cursor) if params.cursor else None
+        # created_at и id нужны для курсора, даже если клиент их не запросил
+        columns = [*fields, *(column for column in ("created_at", "id") if column not in fields)]
+        rows = await self.task_repository.get_page_rows(
+            columns, user_id, params.limit + 1, status=params.status, after=after
+        )
+        last = rows[params.limit - 1] if len(rows) > params.limit else None
+        return {
+            "items": [{field: row[field] for field in fields} for row in rows[: params.limit]],
+            "next_cursor": encode_cursor(last["created_at"], last["id"]) if last else None,
+        }
 
-    async def create_task(self, task_create: TaskCreate, user_id: int, r: redis.Redis) -> TaskModel | None:
+    async def get_task_by_id(self, task_id: int, user_id: int) -> TaskSchema:
+        async def load() -> TaskSchema | None:
+            task_model = await self.task_repository.get_by_id(task_id=task_id, user_id=user_id)
+            return TaskSchema.model_validate(task_model) if task_model else None
+
+        task = await self.cache.get_or_load_task(user_id, task_id, load)
+        if task is None:
+            raise NotFoundException(detail="Task not found")
+        return task
+
+    async def create_task(self, task_create: TaskCreate, user_id: int) -> TaskModel | None:
         if task_create.user_id != user_id:
             raise ValueError(f"{user_id} not qe {user_id}")
         task = await self.task_repository.create(task_create=task_create)
         if not task:
             raise ValueError("...")
-        cache_key = f"task:{task.id}-user:{user_id}"
-        await r.delete(cache_key)
+        await self.cache.invalidate(user_id, updated=[TaskSchema.model_validate(task)])
         return task
 
     async def task_update(self, task_id: int, task_update: TaskCreate, user_id: int) -> TaskModel | None:
-        return await self.task_repository.update(task_id=task_id, task_update=task_update, user_id=user_id)
+        task = await self.task_repository.update(task_id=task_id, task_update=task_update, user_id=user_id)
+        if task:
+            await self.cache.invalidate(user_id, updated=[TaskSchema.model_validate(task)])
+        return task
 
     async def task_delete(self, task_id: int, user_id) -> bool:
-        return await self.task_repository.delete(task_id=task_id, user_id=user_id)
+        deleted = await self.task_repository.delete(task_id=task_id, user_id=user_id)
+        if deleted:
+            await self.cache.invalidate(user_id, deleted=[task_id])
+        return deleted
+
+    async def bulk_create(self, items: list[TaskCreate], user_id: int) -> list[TaskBulkItemResult]:
+        allowed = [item for item in items if item.user_id == user_id]
+        created = iter(await self.task_repository.bulk_create(allowed) if allowed else [])
+        results = []
+        for index, item in enumerate(items):
+            if item.user_id != user_id:
+                results.append(TaskBulkItemResult(index=index, result="forbidden"))
+                continue
+            task = next(created)
+            results.append(
+                TaskBulkItemResult(
+                    index=index, id=task.id, result="created", task=TaskSchema.model_validate(task)
+                )
+            )
+        if allowed:
+            await self.cache.invalidate(user_id, updated=[result.task for result in results if result.task])
+        return results
+
+    async def bulk_update(self, items: list[TaskBulkUpdateItem], user_id: int) -> list[TaskBulkItemResult]:
+        # Одинаковые изменения (например, смена статуса у сотни задач) уходят одним UPDATE
+        groups: dict[str, tuple[list[int], dict]] = {}
+        for item in items:
+            values = item.model_dump(exclude_unset=True, exclude={"id"})
+            key = json.dumps(values, sort_keys=True, default=str)
+            groups.setdefault(key, ([], values))[0].append(item.id)
+        updated = await self.task_repository.bulk_update(list(groups.values()), user_id=user_id)
+        tasks = {task_id: TaskSchema.model_validate(task) for task_id, task in updated.items()}
+        if tasks:
+            await self.cache.invalidate(user_id, updated=list(tasks.values()))
+
+        results = []
+        for index, item in enumerate(items):
+            task = tasks.get(item.id)
+            results.append(
+                TaskBulkItemResult(
+                    index=index, id=item.id, result="updated" if task else "not_found", task=task
+                )
+            )
+        return results
+
+    async def bulk_delete(self, ids: list[int], user_id: int) -> list[TaskBulkItemResult]:
+        deleted = await self.task_repository.bulk_delete(list(set(ids)), user_id=user_id)
+        if deleted:
+            await self.cache.invalidate(user_id, deleted=list(deleted))
+        return [
+            TaskBulkItemResult(
+                index=index, id=task_id, result="deleted" if task_id in deleted else "not_found"
+            )
+            for index, task_id in enumerate(ids)
+        ]
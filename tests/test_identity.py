@@ -0,0 +1,40 @@
+from shared import identity
+from shared.identity import SIGNATURE_HEADER, USER_ID_HEADER, sign_identity, verify_identity
+
+SECRET = "identity-secret"
+
+
+def test_signed_identity_round_trip():
+    headers = dict(sign_identity(SECRET, 42, "get", "/tasks", "limit=10&status=done"))
+
+    assert verify_identity(SECRET, headers, "GET", "/tasks", query="limit=10&status=done") == 42
+
+
+def test_query_encoding_differences_do_not_break_signature():
+    headers = dict(sign_identity(SECRET, 42, "GET", "/tasks", "q=buy milk&tag=%2Fhome"))
+
+    assert verify_identity(SECRET, headers, "GET", "/tasks", query="q=buy+milk&tag=%2Fhome") == 42
+
+
+def test_tampered_request_is_rejected():
+    headers = dict(sign_identity(SECRET, 42, "GET", "/tasks/1", "view=full"))
+
+    assert verify_identity(SECRET, headers, "GET", "/tasks/2", query="view=full") is None
+    assert verify_identity(SECRET, headers, "DELETE", "/tasks/1", query="view=full") is None
+    assert verify_identity(SECRET, headers, "GET", "/tasks/1", query="view=full&owner=7") is None
+    assert verify_identity("other-secret", headers, "GET", "/tasks/1", query="view=full") is None
+    assert (
+        verify_identity(SECRET, {**headers, USER_ID_HEADER: "7"}, "GET", "/tasks/1", query="view=full")
+        is None
+    )
+    assert verify_identity(SECRET, {**headers, SIGNATURE_HEADER: "0" * 64}, "GET", "/tasks/1") is None
+
+
+def test_expired_identity_is_rejected(monkeypatch):
+    headers = dict(sign_identity(SECRET, 42, "GET", "/tasks"))
+    signed_at = identity.time.time()
+
+    monkeypatch.setattr(identity.time, "time", lambda: signed_at + 61)
+
+    assert verify_identity(SECRET, headers, "GET", "/tasks", max_age=60) is None
+    assert verify_identity(SECRET, headers, "GET", "/tasks", max_age=120) == 42
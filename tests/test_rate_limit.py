@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+from starlette.responses import Response
+
+from shared.rate_limit import ClientIP, RateLimit, RateLimiter
+
+
+def make_request(peer: str = "203.0.113.7", forwarded_for: tuple[str, ...] = ()) -> Request:
+    headers = [(b"x-forwarded-for", value.encode()) for value in forwarded_for]
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/limited",
+            "query_string": b"",
+            "headers": headers,
+            "client": (peer, 12345),
+        }
+    )
+
+
+def test_allows_up_to_limit_then_denies(run_with_redis):
+    async def scenario(client):
+        limiter = RateLimiter(lambda: client, prefix="rate:test")
+        return [await limiter.hit("client", limit=3, period=60) for _ in range(4)]
+
+    results = run_with_redis(scenario)
+
+    assert [result.allowed for result in results] == [True, True, True, False]
+    assert [result.remaining for result in results[:3]] == [2, 1, 0]
+    # Следующий запрос станет возможен через интервал между запросами: 60 / 3 = 20 секунд
+    assert 19 < results[3].retry_after <= 20
+
+
+def test_denied_key_is_rejected_locally_without_redis(run_with_redis):
+    async def scenario(client):
+        limiter = RateLimiter(lambda: client, prefix="rate:test")
+        await limiter.hit("client", limit=1, period=60)
+        denied = await limiter.hit("client", limit=1, period=60)
+        limiter.get_client = lambda: None
+        return denied, await limiter.hit("client", limit=1, period=60)
+
+    denied, local = run_with_redis(scenario)
+
+    assert not denied.allowed and not denied.local
+    assert not local.allowed and local.local
+
+
+def test_recovers_after_emission_interval(run_with_redis):
+    async def scenario(client):
+        limiter = RateLimiter(lambda: client, prefix="rate:test")
+        burst = [await limiter.hit("client", limit=4, period=1) for _ in range(5)]
+        await asyncio.sleep(burst[-1].retry_after + 0.05)
+        return burst, await limiter.hit("client", limit=4, period=1)
+
+    burst, recovered = run_with_redis(scenario)
+
+    assert [result.allowed for result in burst] == [True, True, True, True, False]
+    assert burst[-1].retry_after <= 0.25
+    assert recovered.allowed
+
+
+def test_keys_are_limited_independently(run_with_redis):
+    async def scenario(client):
+        limiter = RateLimiter(lambda: client, prefix="rate:test")
+        await limiter.hit("first", limit=1, period=60)
+        return await limiter.hit("first", limit=1, period=60), await limiter.hit("second", limit=1, period=60)
+
+    first, second = run_with_redis(scenario)
+
+    assert not first.allowed
+    assert second.allowed
+
+
+def test_rate_limit_fails_open_without_redis():
+    limit = RateLimit(RateLimiter(lambda: None, prefix="rate:test"), "1/minute")
+    response = Response()
+
+    for _ in range(3):
+        asyncio.run(limit(make_request(), response))
+
+    assert "X-RateLimit-Remaining" not in response.headers
+
+
+def test_rate_limit_rejects_with_retry_after(run_with_redis):
+    async def scenario(client):
+        limit = RateLimit(RateLimiter(lambda: client, prefix="rate:test"), "1/minute")
+        await limit(make_request(), Response())
+        with pytest.raises(HTTPException) as exc_info:
+            await limit(make_request(), Response())
+        return exc_info.value
+
+    error = run_with_redis(scenario)
+
+    assert error.status_code == 429
+    assert error.headers["Retry-After"] == "60"
+
+
+def test_client_ip_ignores_forwarded_for_from_untrusted_peer():
+    key = ClientIP(["10.0.0.0/8"])
+
+    assert key(make_request("203.0.113.7", ("198.51.100.1",))) == "203.0.113.7"
+
+
+def test_client_ip_takes_rightmost_untrusted_hop_behind_trusted_proxy():
+    key = ClientIP(["10.0.0.0/8"])
+    # Первый адрес подставил сам клиент, второй дописал доверенный прокси
+    request = make_request("10.0.0.2", ("1.1.1.1, 198.51.100.1", "10.0.0.1"))
+
+    assert key(request) == "198.51.100.1"
+
+
+def test_client_ip_skips_empty_and_treats_garbage_as_untrusted():
+    key = ClientIP(["10.0.0.0/8"])
+
+    assert key(make_request("10.0.0.2", ("198.51.100.1, not-an-ip, ,10.0.0.1",))) == "not-an-ip"
+
+
+def test_client_ip_falls_back_when_all_hops_are_trusted():
+    key = ClientIP(["10.0.0.0/8"])
+
+    assert key(make_request("10.0.0.2", ("10.0.0.5, 10.0.0.1",))) == "10.0.0.5"
+    assert key(make_request("10.0.0.2")) == "10.0.0.2"
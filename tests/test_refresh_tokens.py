@@ -0,0 +1,102 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from auth_service.app.auth.refresh_tokens import RefreshTokenStore
+from auth_service.app.core.exceptions import ServiceUnavailableException
+
+USER_ID = 42
+
+
+def make_store(client, reuse_grace: float = 0.0) -> RefreshTokenStore:
+    return RefreshTokenStore(
+        lambda: client, ttl=timedelta(days=1), reuse_grace=timedelta(seconds=reuse_grace)
+    )
+
+
+def test_rotation_issues_a_new_token_each_time(run_with_redis):
+    async def scenario(client):
+        store = make_store(client)
+        family, first = await store.start_family(USER_ID)
+        second = await store.rotate(USER_ID, family, first)
+        third = await store.rotate(USER_ID, family, second)
+        return first, second, third
+
+    first, second, third = run_with_redis(scenario)
+
+    assert second and third
+    assert len({first, second, third}) == 3
+
+
+def test_replaying_a_rotated_token_revokes_the_family(run_with_redis):
+    async def scenario(client):
+        store = make_store(client)
+        family, first = await store.start_family(USER_ID)
+        second = await store.rotate(USER_ID, family, first)
+        replayed = await store.rotate(USER_ID, family, first)
+        exists = await client.exists(store.family_key(family))
+        members = await client.smembers(store.user_key(USER_ID))
+        # Законный владелец тоже теряет сессию: его токен больше не принимается
+        after_revoke = await store.rotate(USER_ID, family, second)
+        return replayed, exists, members, after_revoke
+
+    replayed, exists, members, after_revoke = run_with_redis(scenario)
+
+    assert replayed is None
+    assert not exists
+    assert not members
+    assert after_revoke is None
+
+
+def test_token_replaced_within_grace_window_is_rejected_without_revoking(run_with_redis):
+    async def scenario(client):
+        store = make_store(client, reuse_grace=10.0)
+        family, first = await store.start_family(USER_ID)
+        second = await store.rotate(USER_ID, family, first)
+        # Параллельный refresh того же клиента со старым токеном
+        stale = await store.rotate(USER_ID, family, first)
+        return stale, await store.rotate(USER_ID, family, second)
+
+    stale, current = run_with_redis(scenario)
+
+    assert stale is None
+    assert current is not None
+
+
+def test_revoke_user_invalidates_all_families(run_with_redis):
+    async def scenario(client):
+        store = make_store(client)
+        first_family, first = await store.start_family(USER_ID)
+        second_family, second = await store.start_family(USER_ID)
+        await store.revoke_user(USER_ID)
+        return (
+            await store.rotate(USER_ID, first_family, first),
+            await store.rotate(USER_ID, second_family, second),
+        )
+
+    assert run_with_redis(scenario) == (None, None)
+
+
+def test_logout_revokes_only_its_family(run_with_redis):
+    async def scenario(client):
+        store = make_store(client)
+        first_family, first = await store.start_family(USER_ID)
+        second_family, second = await store.start_family(USER_ID)
+        await store.revoke_family(USER_ID, first_family)
+        return (
+            await store.rotate(USER_ID, first_family, first),
+            await store.rotate(USER_ID, second_family, second),
+        )
+
+    revoked, other = run_with_redis(scenario)
+
+    assert revoked is None
+    assert other is not None
+
+
+def test_missing_redis_is_reported_as_unavailable():
+    store = RefreshTokenStore(lambda: None, ttl=timedelta(days=1), reuse_grace=timedelta(0))
+
+    with pytest.raises(ServiceUnavailableException):
+        asyncio.run(store.start_family(USER_ID))
@@ -0,0 +1,133 @@
+import asyncio
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from api_gateway_service.app.cache import ResponseCache, etag_matches, ttl_from_headers
+
+USER = "user:42"
+
+
+def make_request(method: str = "GET", headers: dict[str, str] | None = None) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": method,
+            "path": "/tasks/1",
+            "query_string": b"",
+            "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+        }
+    )
+
+
+class Upstream:
+    """Считает обращения к upstream и отдаёт заранее заданный ответ."""
+
+    def __init__(self, cache_control: str | None = "private, max-age=5", status_code: int = 200):
+        self.calls = 0
+        self.cache_control = cache_control
+        self.status_code = status_code
+
+    async def __call__(self) -> Response:
+        self.calls += 1
+        headers = {"Cache-Control": self.cache_control} if self.cache_control else {}
+        return Response(content=f'{{"call": {self.calls}}}', status_code=self.status_code, headers=headers)
+
+
+def handle(cache: ResponseCache, request: Request, fetch: Upstream, principal: str = USER) -> Response:
+    return asyncio.run(
+        cache.handle(request, "tasks/1", route="tasks", principal=principal, max_ttl=10, fetch=fetch)
+    )
+
+
+def test_ttl_requires_explicit_permission():
+    assert ttl_from_headers([], 10, authorized=False) == 0
+    assert ttl_from_headers([("Cache-Control", "public")], 10, authorized=False) == 10
+    assert ttl_from_headers([("Cache-Control", "max-age=3")], 10, authorized=False) == 3
+    assert ttl_from_headers([("Cache-Control", "public, max-age=60")], 10, authorized=False) == 10
+    assert ttl_from_headers([("Cache-Control", "max-age=soon")], 10, authorized=False) == 0
+    assert ttl_from_headers([("Cache-Control", "public, no-store")], 10, authorized=False) == 0
+
+
+def test_ttl_for_authorized_requests():
+    assert ttl_from_headers([("Cache-Control", "max-age=5")], 10, authorized=True) == 0
+    assert ttl_from_headers([("Cache-Control", "s-maxage=5")], 10, authorized=True) == 5
+    assert ttl_from_headers([("Cache-Control", "private, max-age=5")], 10, authorized=True) == 0
+    assert ttl_from_headers([("Cache-Control", "private, max-age=5")], 10, authorized=True, private=True) == 5
+
+
+def test_ttl_rejects_cookies_and_foreign_vary():
+    public = ("Cache-Control", "public, max-age=5")
+
+    assert ttl_from_headers([public, ("Set-Cookie", "a=b")], 10, authorized=False) == 0
+    assert ttl_from_headers([public, ("Vary", "Accept-Encoding")], 10, authorized=False) == 5
+    assert ttl_from_headers([public, ("Vary", "Accept-Encoding, Accept")], 10, authorized=False) == 0
+
+
+def test_etag_matches_uses_weak_comparison():
+    assert etag_matches('"abc"', 'W/"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+
+
+def test_private_response_is_served_from_cache_for_the_same_user():
+    cache = ResponseCache(max_bytes=1024 * 1024, max_entry_bytes=1024)
+    upstream = Upstream()
+
+    first = handle(cache, make_request(headers={"Authorization": "Bearer t"}), upstream)
+    second = handle(cache, make_request(headers={"Authorization": "Bearer t"}), upstream)
+    other = handle(cache, make_request(headers={"Authorization": "Bearer u"}), upstream, principal="user:7")
+
+    assert upstream.calls == 2
+    assert second.body == first.body
+    assert other.body != first.body
+    assert dict(second.headers)["etag"].startswith('W/"')
+
+
+def test_matching_if_none_match_gets_not_modified():
+    cache = ResponseCache(max_bytes=1024 * 1024, max_entry_bytes=1024)
+    upstream = Upstream()
+    handle(cache, make_request(), upstream)
+    etag = next(iter(cache.entries.values())).etag
+
+    response = handle(cache, make_request(headers={"If-None-Match": etag}), upstream)
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert upstream.calls == 1
+
+
+def test_private_response_is_not_cached_without_verified_user():
+    cache = ResponseCache(max_bytes=1024 * 1024, max_entry_bytes=1024)
+    upstream = Upstream()
+
+    for _ in range(2):
+        handle(cache, make_request(headers={"Authorization": "Bearer t"}), upstream, principal="auth:abc")
+
+    assert upstream.calls == 2
+    assert not cache.entries
+
+
+def test_write_invalidates_the_users_entries():
+    cache = ResponseCache(max_bytes=1024 * 1024, max_entry_bytes=1024)
+    upstream = Upstream()
+    handle(cache, make_request(), upstream)
+    handle(cache, make_request(), upstream, principal="user:7")
+
+    handle(cache, make_request("PUT"), upstream)
+    handle(cache, make_request(), upstream)
+
+    assert upstream.calls == 4
+    assert len(cache.entries) == 2
+
+
+def test_error_responses_are_not_cached():
+    cache = ResponseCache(max_bytes=1024 * 1024, max_entry_bytes=1024)
+    upstream = Upstream(status_code=404)
+
+    handle(cache, make_request(), upstream)
+    handle(cache, make_request(), upstream)
+
+    assert upstream.calls == 2
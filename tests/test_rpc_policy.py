@@ -0,0 +1,124 @@
+# pylint:disable=redefined-outer-name
+import pytest
+
+from task_service.app.core import rpc_policy
+from task_service.app.core.rpc_policy import CLOSED, HALF_OPEN, OPEN, AdaptiveTimeout, CircuitBreaker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(rpc_policy.time, "monotonic", clock)
+    return clock
+
+
+def make_breaker() -> CircuitBreaker:
+    return CircuitBreaker("test", failure_threshold=3, open_seconds=10.0)
+
+
+@pytest.mark.usefixtures("clock")
+def test_breaker_opens_after_consecutive_failures():
+    breaker = make_breaker()
+
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.retry_after() == 10
+
+
+@pytest.mark.usefixtures("clock")
+def test_success_resets_the_failure_count():
+    breaker = make_breaker()
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+
+    assert breaker.state == CLOSED
+
+
+def test_half_open_allows_a_single_probe_and_closes_on_success(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now += 9.9
+    assert not breaker.allow()
+
+    clock.now += 0.1
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # Пока пробный вызов не завершился, остальные отклоняются
+    assert not breaker.allow()
+
+    breaker.record_success()
+
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_the_circuit(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 10.0
+    assert breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_lost_probe_is_replaced_after_open_seconds(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 10.0
+    assert breaker.allow()
+
+    # Пробный вызов отменён и не сообщил результат
+    clock.now += 10.0
+
+    assert breaker.allow()
+
+
+def test_timeout_stays_at_maximum_until_enough_samples():
+    timeout = AdaptiveTimeout(minimum=0.5, maximum=5.0, multiplier=3.0, window=100, min_samples=20)
+
+    for _ in range(19):
+        timeout.observe(0.01)
+
+    assert timeout.value == 5.0
+
+
+def test_timeout_follows_p99_within_bounds():
+    timeout = AdaptiveTimeout(minimum=0.05, maximum=5.0, multiplier=3.0, window=100, min_samples=20)
+
+    for _ in range(100):
+        timeout.observe(0.1)
+    assert timeout.value == pytest.approx(0.3)
+
+    for _ in range(100):
+        timeout.observe(0.001)
+    assert timeout.value == 0.05
+
+    for _ in range(100):
+        timeout.observe(10.0)
+    assert timeout.value == 5.0
@@ -0,0 +1,19 @@
+import pytest
+from pydantic import ValidationError
+
+from task_service.app.schemas.tasks import TaskBulkUpdate
+
+
+def test_bulk_update_accepts_distinct_ids():
+    payload = TaskBulkUpdate.model_validate(
+        {"items": [{"id": 1, "status": "done"}, {"id": 2, "status": "done"}]}
+    )
+
+    assert [item.id for item in payload.items] == [1, 2]
+
+
+def test_bulk_update_rejects_duplicate_ids():
+    items = [{"id": 1, "status": "done"}, {"id": 2, "name": "renamed"}, {"id": 1, "status": "open"}]
+
+    with pytest.raises(ValidationError, match="Duplicate task ids: 1"):
+        TaskBulkUpdate.model_validate({"items": items})
@@ -0,0 +1,115 @@
+import asyncio
+import contextlib
+import datetime
+
+from shared.lru import TTLCache
+from task_service.app.core.redis_client import redis_client
+from task_service.app.models.task import TaskStatus
+from task_service.app.schemas.tasks import Task
+from task_service.app.services.cache import TaskCache
+
+USER_ID = 1
+TASK_ID = 10
+
+
+def make_task(name: str) -> Task:
+    now = datetime.datetime(2026, 1, 1)
+    return Task(
+        id=TASK_ID,
+        name=name,
+        status=TaskStatus.OPEN,
+        description=None,
+        user_id=USER_ID,
+        is_active=True,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def make_cache(local: TTLCache | None = None) -> TaskCache:
+    return TaskCache(ttl=60, list_ttl=60, negative_ttl=60, early_refresh_beta=0.0, local=local)
+
+
+def loader_of(value: Task | None, calls: list[str]):
+    async def load():
+        calls.append("load")
+        return value
+
+    return load
+
+
+def test_stale_load_does_not_overwrite_newer_write(run_with_redis, monkeypatch):
+    async def scenario(client):
+        monkeypatch.setattr(redis_client, "client", client)
+        cache = make_cache()
+
+        async def slow_loader():
+            # Пока чтение из БД идёт, задачу меняет другой запрос
+            await cache.invalidate(USER_ID, updated=[make_task("new")])
+            return make_task("old")
+
+        loaded = await cache.get_or_load_task(USER_ID, TASK_ID, slow_loader)
+        calls = []
+        cached = await cache.get_or_load_task(USER_ID, TASK_ID, loader_of(None, calls))
+        return loaded, cached, calls
+
+    loaded, cached, calls = run_with_redis(scenario)
+
+    assert loaded.name == "old"
+    assert cached.name == "new"
+    assert not calls
+
+
+def test_negative_entry_is_replaced_when_task_is_created(run_with_redis, monkeypatch):
+    async def scenario(client):
+        monkeypatch.setattr(redis_client, "client", client)
+        cache = make_cache()
+        calls = []
+
+        missing = await cache.get_or_load_task(USER_ID, TASK_ID, loader_of(None, calls))
+        again = await cache.get_or_load_task(USER_ID, TASK_ID, loader_of(None, calls))
+        await cache.invalidate(USER_ID, updated=[make_task("created")])
+        created = await cache.get_or_load_task(USER_ID, TASK_ID, loader_of(None, calls))
+        return missing, again, created, calls
+
+    missing, again, created, calls = run_with_redis(scenario)
+
+    assert missing is None and again is None
+    assert calls == ["load"]
+    assert created.name == "created"
+
+
+def test_invalidation_message_evicts_other_replica_l1(run_with_redis, monkeypatch):
+    async def wait_for(condition):
+        for _ in range(200):
+            if condition():
+                return
+            await asyncio.sleep(0.01)
+        raise AssertionError("condition not met")
+
+    async def scenario(client):
+        monkeypatch.setattr(redis_client, "client", client)
+        writer = make_cache(local=TTLCache(maxsize=100, ttl=60))
+        reader = make_cache(local=TTLCache(maxsize=100, ttl=60))
+        listener = asyncio.create_task(reader.listen_invalidations())
+        try:
+            await wait_for(lambda: reader.local_ready)
+            calls = []
+            key = reader.item_key(USER_ID, TASK_ID)
+            await reader.get_or_load_task(USER_ID, TASK_ID, loader_of(make_task("old"), calls))
+            in_l1 = reader.local.get(key) is not None
+
+            await writer.invalidate(USER_ID, updated=[make_task("new")])
+            await wait_for(lambda: reader.local.get(key) is None)
+            fresh = await reader.get_or_load_task(USER_ID, TASK_ID, loader_of(None, calls))
+            return in_l1, fresh, calls
+        finally:
+            listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await listener
+
+    in_l1, fresh, calls = run_with_redis(scenario)
+
+    assert in_l1
+    assert fresh.name == "new"
+    assert calls == ["load"]
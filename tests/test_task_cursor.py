@@ -0,0 +1,80 @@
+import asyncio
+import datetime
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from task_service.app.core.exceptions import BadRequestException
+from task_service.app.models.task import Task as TaskModel
+from task_service.app.models.task import TaskStatus
+from task_service.app.repositories.tasks import TaskRepository
+from task_service.app.schemas.tasks import TaskListParams
+from task_service.app.services.tasks import TaskService, decode_cursor, encode_cursor
+
+CREATED_AT = datetime.datetime(2026, 1, 2, 3, 4, 5, 678901)
+
+
+class PageRepository:
+    """Keyset-страницы в памяти с тем же порядком, что и в БД: (created_at, id) по убыванию."""
+
+    def __init__(self, tasks: list[TaskModel]):
+        self.tasks = sorted(tasks, key=lambda task: (task.created_at, task.id), reverse=True)
+
+    async def get_page(self, user_id: int, limit: int, status=None, after=None) -> list[TaskModel]:
+        _ = user_id, status
+        return [task for task in self.tasks if after is None or (task.created_at, task.id) < after][:limit]
+
+
+def make_task(task_id: int, created_at: datetime.datetime = CREATED_AT) -> TaskModel:
+    return TaskModel(
+        id=task_id,
+        name=f"task {task_id}",
+        status=TaskStatus.OPEN,
+        description=None,
+        user_id=1,
+        is_active=True,
+        created_at=created_at,
+        updated_at=created_at,
+    )
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(CREATED_AT, 42)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (CREATED_AT, 42)
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", "bm90IGpzb24", encode_cursor(CREATED_AT, 1)[:-4]])
+def test_invalid_cursor_is_a_bad_request(cursor):
+    with pytest.raises(BadRequestException) as exc_info:
+        decode_cursor(cursor)
+
+    assert exc_info.value.status_code == 400
+
+
+def test_pages_split_tasks_with_equal_created_at_by_id():
+    earlier = CREATED_AT - datetime.timedelta(seconds=1)
+    tasks = [make_task(task_id) for task_id in (3, 7, 5, 9)] + [make_task(1, earlier), make_task(2, earlier)]
+    service = TaskService(PageRepository(tasks), cache=None)
+
+    pages, cursor = [], None
+    while True:
+        page = asyncio.run(service.get_tasks(user_id=1, params=TaskListParams(limit=2, cursor=cursor)))
+        pages.append([task.id for task in page.items])
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert pages == [[9, 7], [5, 3], [2, 1]]
+
+
+def test_page_query_compares_created_at_and_id_as_a_row():
+    query = TaskRepository._page_query(  # pylint:disable=protected-access
+        select(TaskModel), user_id=1, limit=3, status=None, after=(CREATED_AT, 7)
+    )
+    sql = str(query.compile(dialect=postgresql.dialect()))
+
+    assert "(tasks.created_at, tasks.id) < (" in sql
+    assert "ORDER BY tasks.created_at DESC, tasks.id DESC" in sql
@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+import httpx
+import jwt
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from jwt.algorithms import OKPAlgorithm
+
+from shared.tokens import AccessTokenVerifier, JWKSKeySet
+
+SECRET = "legacy-secret-key-with-at-least-32-bytes"
+
+
+def make_token(key, algorithm: str, kid: str | None = None, user_id: int = 42) -> str:
+    payload = {"id": user_id, "type": "access", "exp": int(time.time()) + 60}
+    return jwt.encode(payload, key, algorithm=algorithm, headers={"kid": kid} if kid else None)
+
+
+def make_jwks(kid: str) -> tuple[JWKSKeySet, ed25519.Ed25519PrivateKey]:
+    private_key = ed25519.Ed25519PrivateKey.generate()
+    jwk = OKPAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    jwk.update({"kid": kid, "alg": "EdDSA"})
+    jwks = JWKSKeySet("http://auth.invalid/.well-known/jwks.json")
+    jwks.keys = {kid: jwt.PyJWK(jwk)}
+    jwks._last_refresh = time.monotonic()  # pylint:disable=protected-access
+    return jwks, private_key
+
+
+def test_jwks_verifier_accepts_kid_and_legacy_tokens():
+    jwks, private_key = make_jwks("k1")
+    verifier = AccessTokenVerifier(key=SECRET, algorithm="HS256", jwks=jwks)
+
+    assert asyncio.run(verifier.verify(make_token(private_key, "EdDSA", kid="k1"))) == 42
+    assert asyncio.run(verifier.verify(make_token(SECRET, "HS256", user_id=7))) == 7
+    assert asyncio.run(verifier.verify(make_token("another-secret-key-with-32-bytes!!", "HS256"))) is None
+
+
+def test_legacy_tokens_are_rejected_without_legacy_key():
+    jwks, _ = make_jwks("k1")
+    verifier = AccessTokenVerifier(jwks=jwks)
+
+    assert asyncio.run(verifier.verify(make_token(SECRET, "HS256"))) is None
+
+
+def test_connect_survives_unavailable_jwks(monkeypatch):
+    jwks = JWKSKeySet("http://auth.invalid/.well-known/jwks.json")
+
+    async def refresh():
+        raise httpx.ConnectError("connection refused")
+
+    monkeypatch.setattr(jwks, "refresh", refresh)
+
+    asyncio.run(AccessTokenVerifier(jwks=jwks).connect())
+
+    assert not jwks.keys